@@ -7,9 +7,17 @@
 - generate_html_report: 生成 HTML 报告
 """
 
+import gzip
 from pathlib import Path
 from typing import Dict, List, Optional, Callable
 
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+    brotli = None
+
 
 def prepare_report_data(
     stats: List[Dict],
@@ -139,6 +147,30 @@ def prepare_report_data(
     }
 
 
+def _write_precompressed(html_bytes: bytes, paths: List[Path]) -> None:
+    """
+    为 HTML 写入预压缩副本（.gz，安装 brotli 时另写 .br）
+
+    报告一次生成、多次访问，压缩只做一次并使用最高压缩级别，
+    外部静态服务器（如 nginx gzip_static / brotli_static）可直接返回压缩文件；
+    项目自带的 python -m http.server 不会使用这些副本
+
+    Args:
+        html_bytes: UTF-8 编码的 HTML 内容
+        paths: 需要生成压缩副本的 HTML 文件路径
+    """
+    variants = [(".gz", gzip.compress(html_bytes, compresslevel=9, mtime=0))]
+    if HAS_BROTLI:
+        variants.append((".br", brotli.compress(html_bytes, quality=11)))
+
+    for path in paths:
+        for suffix, data in variants:
+            path.with_name(path.name + suffix).write_bytes(data)
+        if not HAS_BROTLI:
+            # 未安装 brotli 时删除旧的 .br，避免服务器返回过期内容
+            path.with_name(path.name + ".br").unlink(missing_ok=True)
+
+
 def generate_html_report(
     stats: List[Dict],
     total_titles: int,
@@ -162,6 +194,7 @@ def generate_html_report(
     1. 保存时间戳快照到 output/html/日期/时间.html（历史记录）
     2. 复制到 output/html/latest/{mode}.html（最新报告）
     3. 复制到 output/index.html 和根目录 index.html（入口）
+    4. 为 latest/{mode}.html 和 output/index.html 写入 .gz（及 .br）预压缩副本
 
     Args:
         stats: 统计结果列表
@@ -211,27 +244,29 @@ def generate_html_report(
         # 默认简单 HTML
         html_content = f"<html><body><h1>Report</h1><pre>{report_data}</pre></body></html>"
 
+    # 只编码一次，后续各副本直接写入字节
+    html_bytes = html_content.encode("utf-8")
+
     # 1. 保存时间戳快照（历史记录）
-    with open(snapshot_file, "w", encoding="utf-8") as f:
-        f.write(html_content)
+    Path(snapshot_file).write_bytes(html_bytes)
 
     # 2. 复制到 html/latest/{mode}.html（最新报告）
     latest_dir = Path(output_dir) / "html" / "latest"
     latest_dir.mkdir(parents=True, exist_ok=True)
     latest_file = latest_dir / f"{mode}.html"
-    with open(latest_file, "w", encoding="utf-8") as f:
-        f.write(html_content)
+    latest_file.write_bytes(html_bytes)
 
     # 3. 复制到 index.html（入口）
     # output/index.html（供 Docker Volume 挂载访问）
     output_index = Path(output_dir) / "index.html"
-    with open(output_index, "w", encoding="utf-8") as f:
-        f.write(html_content)
+    output_index.write_bytes(html_bytes)
 
     # 根目录 index.html（供 GitHub Pages 访问）
     root_index = Path("index.html")
-    with open(root_index, "w", encoding="utf-8") as f:
-        f.write(html_content)
+    root_index.write_bytes(html_bytes)
+
+    # 4. 为 Web 服务器提供的入口写入预压缩副本
+    _write_precompressed(html_bytes, [latest_file, output_index])
 
     return snapshot_file
 
@@ -9,6 +9,17 @@ import re
 from typing import List
 
 
+# HTML 转义映射表及特殊字符检测（无特殊字符时直接返回原串）
+_HTML_ESCAPE_TABLE = str.maketrans({
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    '"': "&quot;",
+    "'": "&#x27;",
+})
+_NEEDS_HTML_ESCAPE = re.compile(r"[&<>\"']").search
+
+
 def clean_title(title: str) -> str:
     """清理标题中的特殊字符
 
@@ -50,13 +61,10 @@ def html_escape(text: str) -> str:
     if not isinstance(text, str):
         text = str(text)
 
-    return (
-        text.replace("&", "&amp;")
-        .replace("<", "&lt;")
-        .replace(">", "&gt;")
-        .replace('"', "&quot;")
-        .replace("'", "&#x27;")
-    )
+    # 快速路径：大多数标题不含特殊字符，跳过转义
+    if _NEEDS_HTML_ESCAPE(text) is None:
+        return text
+    return text.translate(_HTML_ESCAPE_TABLE)
 
 
 def format_rank_display(ranks: List[int], rank_threshold: int, format_type: str) -> str:
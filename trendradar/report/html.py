@@ -5,54 +5,178 @@ HTML 报告渲染模块
 提供 HTML 格式的热点新闻报告生成功能
 """
 
+import json
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Callable
+from typing import Any, Dict, List, Optional, Callable, Tuple
 
 from trendradar.report.helpers import html_escape
 from trendradar.utils.time import convert_time_for_display
 from trendradar.ai.formatter import render_ai_analysis_html_rich
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+    orjson = None
 
-def render_html_content(
-    report_data: Dict,
-    total_titles: int,
-    mode: str = "daily",
-    update_info: Optional[Dict] = None,
-    *,
-    region_order: Optional[List[str]] = None,
-    get_time_func: Optional[Callable[[], datetime]] = None,
-    rss_items: Optional[List[Dict]] = None,
-    rss_new_items: Optional[List[Dict]] = None,
-    display_mode: str = "keyword",
-    standalone_data: Optional[Dict] = None,
-    ai_analysis: Optional[Any] = None,
-    show_new_section: bool = True,
+
+def _dumps_page_data(data: Dict[str, Any]) -> str:
+    """
+    序列化嵌入页面的数据（紧凑格式，保留非 ASCII 字符）
+
+    安装了 orjson 时优先使用，否则回退到标准库 json
+
+    Args:
+        data: 待序列化的数据
+
+    Returns:
+        JSON 字符串
+    """
+    if HAS_ORJSON:
+        return orjson.dumps(data).decode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _rank_class(min_rank: int, rank_threshold: int = 10) -> str:
+    """根据最高排名确定排名等级 CSS 类名
+
+    Args:
+        min_rank: 最高排名（数值最小）
+        rank_threshold: 高亮阈值
+
+    Returns:
+        "top"（前 3）、"high"（阈值内）或空字符串
+    """
+    if min_rank <= 3:
+        return "top"
+    if min_rank <= rank_threshold:
+        return "high"
+    return ""
+
+
+def _rank_range(ranks: List[int]) -> Tuple[int, str]:
+    """计算排名区间及显示文本
+
+    Args:
+        ranks: 排名历史列表（非空）
+
+    Returns:
+        (最高排名, 排名显示文本)，如 (1, "1") 或 (2, "2-8")
+    """
+    min_rank = min(ranks)
+    max_rank = max(ranks)
+    if min_rank == max_rank:
+        return min_rank, str(min_rank)
+    return min_rank, f"{min_rank}-{max_rank}"
+
+
+def _escape_titles_and_urls(
+    items: List[Dict], get_url: Callable[[Dict], str]
+) -> Tuple[List[str], List[str]]:
+    """在渲染循环前批量转义条目标题和链接
+
+    Args:
+        items: 条目列表
+        get_url: 从条目中取链接的函数
+
+    Returns:
+        (转义后的标题列表, 转义后的链接列表)，无链接的条目对应空字符串
+    """
+    escaped_titles = [html_escape(item.get("title", "")) for item in items]
+    escaped_urls = [html_escape(url) if url else "" for url in map(get_url, items)]
+    return escaped_titles, escaped_urls
+
+
+def _render_title(escaped_title: str, escaped_url: str, link_class: str = "news-link") -> str:
+    """渲染标题片段（有链接时包裹 a 标签）
+
+    Args:
+        escaped_title: 已转义的标题
+        escaped_url: 已转义的链接（可为空）
+        link_class: a 标签的 class
+
+    Returns:
+        渲染后的标题 HTML 片段
+    """
+    if escaped_url:
+        return f'<a href="{escaped_url}" target="_blank" class="{link_class}">{escaped_title}</a>'
+    return escaped_title
+
+
+def _render_news_item(
+    index: int,
+    escaped_title: str,
+    escaped_url: str,
+    header_parts: List[str],
+    item_class: str = "news-item",
 ) -> str:
-    """渲染HTML内容
+    """渲染单条新闻条目 HTML（热榜统计区与独立展示区共用 news-item 结构）
 
     Args:
-        report_data: 报告数据字典，包含 stats, new_titles, failed_ids, total_new_count
-        total_titles: 新闻总数
-        mode: 报告模式 ("daily", "current", "incremental")
-        update_info: 更新信息（可选）
-        region_order: 区域显示顺序列表
-        get_time_func: 获取当前时间的函数（可选，默认使用 datetime.now）
-        rss_items: RSS 统计条目列表（可选）
-        rss_new_items: RSS 新增条目列表（可选）
-        display_mode: 显示模式 ("keyword"=按关键词分组, "platform"=按平台分组)
-        standalone_data: 独立展示区数据（可选），包含 platforms 和 rss_feeds
-        ai_analysis: AI 分析结果对象（可选），AIAnalysisResult 实例
-        show_new_section: 是否显示新增热点区域
+        index: 条目序号
+        escaped_title: 已转义的新闻标题
+        escaped_url: 已转义的新闻链接（为空时仅显示标题）
+        header_parts: 头部信息片段列表（已转义的 span 标签）
+        item_class: 条目外层 div 的 class
 
     Returns:
-        渲染后的 HTML 字符串
+        渲染后的条目 HTML 字符串
     """
-    # 默认区域顺序
-    default_region_order = ["hotlist", "rss", "new_items", "standalone", "ai_analysis"]
-    if region_order is None:
-        region_order = default_region_order
+    title_html = _render_title(escaped_title, escaped_url)
+    header_html = "".join(header_parts)
+
+    return f"""
+                    <div class="{item_class}">
+                        <div class="news-number">{index}</div>
+                        <div class="news-content">
+                            <div class="news-header">{header_html}
+                            </div>
+                            <div class="news-title">{title_html}
+                            </div>
+                        </div>
+                    </div>"""
+
+
+def _compact_script(source: str) -> str:
+    """精简内联脚本：去掉行首缩进和整行 // 注释
+
+    保留换行（不影响自动分号插入），多行模板字符串内的行原样保留。
+    模板字符串按每行反引号数量的奇偶判断，因此脚本中的反引号只能用于模板字符串
+    （不能出现在普通字符串、正则或注释中）；违反时状态会错位，此处尽量检测并报错。
+
+    Args:
+        source: 原始脚本文本
+
+    Returns:
+        精简后的脚本文本
 
-    html = """
+    Raises:
+        ValueError: 反引号未配对或被当作注释删除，无法安全精简
+    """
+    lines = []
+    in_template = False
+    for line in source.split("\n"):
+        if in_template:
+            lines.append(line)
+        else:
+            stripped = line.lstrip()
+            if stripped and not stripped.startswith("//"):
+                lines.append(stripped)
+        # 奇数个反引号表示模板字符串在本行开始或结束
+        if (line.count("`") - line.count("\\`")) % 2:
+            in_template = not in_template
+
+    result = "\n".join(lines)
+    if in_template or result.count("`") != source.count("`"):
+        raise ValueError("内联脚本中的反引号无法配对，不能安全精简")
+    return result
+
+
+# 静态页面模板片段（模块加载时创建一次，渲染时只拼接动态内容）
+
+# 页面头部：<head>（样式、脚本依赖）至页眉信息区域
+_HTML_HEAD = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -218,11 +342,13 @@ def render_html_content(
                 color: #9ca3af;
             }
 
-            .word-group.collapsed .collapse-icon {
+            .word-group.collapsed .collapse-icon,
+            body.all-collapsed .word-group:not(.expanded) .collapse-icon {
                 transform: rotate(-90deg);
             }
 
-            .word-group.collapsed .news-item {
+            .word-group.collapsed .news-item,
+            body.all-collapsed .word-group:not(.expanded) .news-item {
                 display: none;
             }
 
@@ -878,6 +1004,14 @@ def render_html_content(
 
             .word-group {
                 margin-bottom: 40px;
+                /* 屏幕外的词组跳过渲染，滚动到附近时再布局绘制（占位高度取常见词组高度） */
+                content-visibility: auto;
+                contain-intrinsic-size: auto 500px;
+            }
+
+            /* 导出图片时所有词组必须完整布局，尺寸测量和截图才准确 */
+            body.exporting-image .word-group {
+                content-visibility: visible;
             }
 
             .word-group:first-child {
@@ -1464,1104 +1598,426 @@ def render_html_content(
                         <span class="info-label">报告类型</span>
                         <span class="info-value">"""
 
-    # 处理报告类型显示（根据 mode 直接显示）
-    if mode == "current":
-        html += "当前榜单"
-    elif mode == "incremental":
-        html += "增量分析"
-    else:
-        html += "全天汇总"
-
-    html += """</span>
-                    </div>
-                    <div class="info-item">
-                        <span class="info-label">新闻总数</span>
-                        <span class="info-value">"""
-
-    html += f"{total_titles} 条"
-
-    # 计算筛选后的热点新闻数量
-    hot_news_count = sum(len(stat["titles"]) for stat in report_data["stats"])
-
-    html += """</span>
-                    </div>
-                    <div class="info-item">
-                        <span class="info-label">热点新闻</span>
-                        <span class="info-value">"""
-
-    html += f"{hot_news_count} 条"
-
-    html += """</span>
-                    </div>
-                    <div class="info-item">
-                        <span class="info-label">生成时间</span>
-                        <span class="info-value">"""
-
-    # 使用提供的时间函数或默认 datetime.now
-    if get_time_func:
-        now = get_time_func()
-    else:
-        now = datetime.now()
-    html += now.strftime("%m-%d %H:%M")
-
-    html += """</span>
-                    </div>
+# 页面底部：页脚收尾及 AI 对话窗口，末尾为页面数据 JSON 的起始标签
+_HTML_CHAT_WIDGET = """
                 </div>
             </div>
+        </div>
 
-            <div class="toolbar">
-                <div class="search-box">
-                    <span class="search-icon">🔍</span>
-                    <input type="text" class="search-input" placeholder="搜索新闻标题..." oninput="handleSearch(this.value)">
+        <!-- AI 对话浮动按钮 -->
+        <button class="chat-fab" onclick="toggleChatWindow()" title="AI 智能对话">
+            💬
+        </button>
+
+        <!-- AI 对话窗口 -->
+        <div class="chat-window" id="chatWindow">
+            <div class="chat-header">
+                <div class="chat-header-title">
+                    <span>🤖</span>
+                    <span>AI 智能助手</span>
+                </div>
+                <div class="chat-header-actions">
+                    <button class="chat-header-btn" onclick="toggleChatSettings()" title="设置">⚙️</button>
+                    <button class="chat-header-btn" onclick="clearChatHistory()" title="清空">🗑️</button>
+                    <button class="chat-header-btn" onclick="toggleChatWindow()" title="关闭">✕</button>
                 </div>
-                <button class="toolbar-btn" onclick="toggleAllGroups()" title="展开/折叠全部">
-                    <span>📂</span> 折叠
-                </button>
-                <button class="toolbar-btn" onclick="toggleDarkMode()" title="切换暗色模式">
-                    <span class="dark-mode-icon">🌙</span> 暗色
-                </button>
-                <button class="toolbar-btn" id="autoRefreshBtn" onclick="toggleAutoRefresh()" title="自动刷新">
-                    <span>🔄</span> <span id="autoRefreshText">自动刷新</span>
-                </button>
             </div>
-            <div class="search-stats" id="searchStats"></div>
-            <div class="refresh-countdown hidden" id="refreshCountdown">下次刷新: <span id="countdown">--</span> 秒</div>
 
-            <div class="stats-cards" id="statsCards">
-                <div class="stat-card">
-                    <div class="stat-value" id="statTotalNews">--</div>
-                    <div class="stat-label">新闻总数</div>
+            <div class="chat-settings" id="chatSettings">
+                <div class="chat-settings-title">API 配置</div>
+                <div class="chat-settings-group">
+                    <label class="chat-settings-label">AI 提供商</label>
+                    <select class="chat-settings-select" id="chatProvider">
+                        <option value="deepseek">DeepSeek</option>
+                        <option value="openai">OpenAI</option>
+                        <option value="anthropic">Anthropic</option>
+                        <option value="custom">自定义</option>
+                    </select>
                 </div>
-                <div class="stat-card">
-                    <div class="stat-value" id="statHotNews">--</div>
-                    <div class="stat-label">热点新闻</div>
+                <div class="chat-settings-group">
+                    <label class="chat-settings-label">API Key</label>
+                    <input type="password" class="chat-settings-input" id="chatApiKey" placeholder="输入你的 API Key">
                 </div>
-                <div class="stat-card">
-                    <div class="stat-value" id="statKeywords">--</div>
-                    <div class="stat-label">关键词组</div>
+                <div class="chat-settings-group" id="customBaseUrlGroup" style="display:none;">
+                    <label class="chat-settings-label">自定义 Base URL</label>
+                    <input type="text" class="chat-settings-input" id="chatBaseUrl" placeholder="https://api.example.com/v1">
                 </div>
-                <div class="stat-card">
-                    <div class="stat-value" id="statNewItems">--</div>
-                    <div class="stat-label">新增热点</div>
+                <div class="chat-settings-group">
+                    <label class="chat-settings-label">MCP Server 地址</label>
+                    <input type="text" class="chat-settings-input" id="mcpServerUrl" placeholder="http://127.0.0.1:3333" value="http://127.0.0.1:3333">
                 </div>
+                <button class="chat-settings-save" onclick="saveChatSettings()">保存设置</button>
             </div>
 
-            <!-- 数据可视化图表区域 -->
-            <div class="charts-section" id="chartsSection">
-                <div class="charts-grid">
-                    <div class="chart-container">
-                        <div class="chart-title">📊 平台分布</div>
-                        <div class="chart-canvas-wrapper">
-                            <canvas id="platformChart"></canvas>
-                        </div>
-                    </div>
-                    <div class="chart-container">
-                        <div class="chart-title">🔥 热词 TOP 10</div>
-                        <div class="chart-canvas-wrapper">
-                            <canvas id="keywordChart"></canvas>
-                        </div>
-                    </div>
+            <div class="chat-messages" id="chatMessages">
+                <div class="chat-message system">
+                    👋 你好！我是 TrendRadar AI 助手。我可以帮你分析热点新闻、查询历史数据、推荐关注话题。请先在设置中配置 API Key。
                 </div>
             </div>
 
-            <div class="content">"""
+            <div class="chat-quick-actions">
+                <button class="chat-quick-btn" onclick="sendQuickMessage('今日热点有哪些？')">📊 今日热点</button>
+                <button class="chat-quick-btn" onclick="sendQuickMessage('分析当前新闻趋势')">📈 趋势分析</button>
+                <button class="chat-quick-btn" onclick="sendQuickMessage('推荐值得关注的话题')">💡 智能推荐</button>
+                <button class="chat-quick-btn" onclick="sendQuickMessage('总结今天的重要新闻')">📝 新闻摘要</button>
+            </div>
 
-    # 处理失败ID错误信息
-    if report_data["failed_ids"]:
-        html += """
-                <div class="error-section">
-                    <div class="error-title">⚠️ 请求失败的平台</div>
-                    <ul class="error-list">"""
-        for id_value in report_data["failed_ids"]:
-            html += f'<li class="error-item">{html_escape(id_value)}</li>'
-        html += """
-                    </ul>
-                </div>"""
+            <div class="chat-input-area">
+                <input type="text" class="chat-input" id="chatInput" placeholder="输入消息..." onkeypress="handleChatKeypress(event)">
+                <button class="chat-send-btn" onclick="sendChatMessage()" id="chatSendBtn">➤</button>
+            </div>
+        </div>
 
-    # 计算图表数据
-    platform_counts = {}
-    keyword_counts = []
-    
-    if report_data["stats"]:
-        for stat in report_data["stats"]:
-            # 统计关键词热度
-            keyword_counts.append({
-                "word": stat["word"],
-                "count": stat["count"]
-            })
-            # 统计平台分布
-            for title_data in stat["titles"]:
-                platform = title_data.get("source_name", "未知")
-                platform_counts[platform] = platform_counts.get(platform, 0) + 1
-    
-    # 取 TOP 10 关键词
-    keyword_counts = keyword_counts[:10]
-    
-    # 转换为 JSON 字符串供 JavaScript 使用
-    import json
-    platform_data_json = json.dumps(platform_counts, ensure_ascii=False)
-    keyword_data_json = json.dumps(keyword_counts, ensure_ascii=False)
+        <script type="application/json" id="trData">"""
 
-    # 生成热点词汇统计部分的HTML
-    stats_html = ""
-    if report_data["stats"]:
-        total_count = len(report_data["stats"])
+# 页面脚本：搜索、折叠、图表、AI 对话等交互逻辑
+_HTML_SCRIPT = """</script>
+        <script>
+            // 页面数据由服务端注入，仅在首次使用（图表进入视口或 AI 对话取上下文）时解析
+            let trData = null;
+            function getTRData() {
+                if (trData === null) {
+                    trData = JSON.parse(document.getElementById('trData').textContent);
+                }
+                return trData;
+            }
+            
+            // 常用元素引用（脚本位于 body 末尾，元素均已解析，只查找一次）
+            const els = {
+                searchStats: document.getElementById('searchStats'),
+                autoRefreshBtn: document.getElementById('autoRefreshBtn'),
+                autoRefreshText: document.getElementById('autoRefreshText'),
+                refreshCountdown: document.getElementById('refreshCountdown'),
+                countdown: document.getElementById('countdown'),
+                chatWindow: document.getElementById('chatWindow'),
+                chatSettings: document.getElementById('chatSettings'),
+                chatProvider: document.getElementById('chatProvider'),
+                chatApiKey: document.getElementById('chatApiKey'),
+                chatBaseUrl: document.getElementById('chatBaseUrl'),
+                mcpServerUrl: document.getElementById('mcpServerUrl'),
+                customBaseUrlGroup: document.getElementById('customBaseUrlGroup'),
+                chatMessages: document.getElementById('chatMessages'),
+                chatInput: document.getElementById('chatInput'),
+                chatSendBtn: document.getElementById('chatSendBtn')
+            };
+            
+            async function saveAsImage() {
+                const button = event.target;
+                const originalText = button.textContent;
 
-        for i, stat in enumerate(report_data["stats"], 1):
-            count = stat["count"]
+                try {
+                    button.textContent = '生成中...';
+                    button.disabled = true;
+                    document.body.classList.add('exporting-image');
+                    ensureChartsBuilt();
+                    window.scrollTo(0, 0);
 
-            # 确定热度等级
-            if count >= 10:
-                count_class = "hot"
-            elif count >= 5:
-                count_class = "warm"
-            else:
-                count_class = ""
-
-            escaped_word = html_escape(stat["word"])
+                    // 等待页面稳定
+                    await new Promise(resolve => setTimeout(resolve, 200));
 
-            stats_html += f"""
-                <div class="word-group">
-                    <div class="word-header">
-                        <div class="word-info">
-                            <div class="word-name">{escaped_word}</div>
-                            <div class="word-count {count_class}">{count} 条</div>
-                        </div>
-                        <div class="word-index">{i}/{total_count}</div>
-                    </div>"""
+                    // 截图前隐藏按钮
+                    const buttons = document.querySelector('.save-buttons');
+                    buttons.style.visibility = 'hidden';
 
-            # 处理每个词组下的新闻标题，给每条新闻标上序号
-            for j, title_data in enumerate(stat["titles"], 1):
-                is_new = title_data.get("is_new", False)
-                new_class = "new" if is_new else ""
+                    // 再次等待确保按钮完全隐藏
+                    await new Promise(resolve => setTimeout(resolve, 100));
 
-                stats_html += f"""
-                    <div class="news-item {new_class}">
-                        <div class="news-number">{j}</div>
-                        <div class="news-content">
-                            <div class="news-header">"""
+                    const container = document.querySelector('.container');
 
-                # 根据 display_mode 决定显示来源还是关键词
-                if display_mode == "keyword":
-                    # keyword 模式：显示来源
-                    stats_html += f'<span class="source-name">{html_escape(title_data["source_name"])}</span>'
-                else:
-                    # platform 模式：显示关键词
-                    matched_keyword = title_data.get("matched_keyword", "")
-                    if matched_keyword:
-                        stats_html += f'<span class="keyword-tag">[{html_escape(matched_keyword)}]</span>'
+                    const canvas = await html2canvas(container, {
+                        backgroundColor: '#ffffff',
+                        scale: 1.5,
+                        useCORS: true,
+                        allowTaint: false,
+                        imageTimeout: 10000,
+                        removeContainer: false,
+                        foreignObjectRendering: false,
+                        logging: false,
+                        width: container.offsetWidth,
+                        height: container.offsetHeight,
+                        x: 0,
+                        y: 0,
+                        scrollX: 0,
+                        scrollY: 0,
+                        windowWidth: window.innerWidth,
+                        windowHeight: window.innerHeight
+                    });
 
-                # 处理排名显示
-                ranks = title_data.get("ranks", [])
-                if ranks:
-                    min_rank = min(ranks)
-                    max_rank = max(ranks)
-                    rank_threshold = title_data.get("rank_threshold", 10)
-
-                    # 确定排名等级
-                    if min_rank <= 3:
-                        rank_class = "top"
-                    elif min_rank <= rank_threshold:
-                        rank_class = "high"
-                    else:
-                        rank_class = ""
+                    buttons.style.visibility = 'visible';
 
-                    if min_rank == max_rank:
-                        rank_text = str(min_rank)
-                    else:
-                        rank_text = f"{min_rank}-{max_rank}"
+                    const link = document.createElement('a');
+                    const now = new Date();
+                    const filename = `TrendRadar_热点新闻分析_${now.getFullYear()}${String(now.getMonth() + 1).padStart(2, '0')}${String(now.getDate()).padStart(2, '0')}_${String(now.getHours()).padStart(2, '0')}${String(now.getMinutes()).padStart(2, '0')}.png`;
 
-                    stats_html += f'<span class="rank-num {rank_class}">{rank_text}</span>'
+                    link.download = filename;
+                    link.href = canvas.toDataURL('image/png', 1.0);
 
-                # 处理时间显示
-                time_display = title_data.get("time_display", "")
-                if time_display:
-                    # 简化时间显示格式，将波浪线替换为~
-                    simplified_time = (
-                        time_display.replace(" ~ ", "~")
-                        .replace("[", "")
-                        .replace("]", "")
-                    )
-                    stats_html += (
-                        f'<span class="time-info">{html_escape(simplified_time)}</span>'
-                    )
+                    // 触发下载
+                    document.body.appendChild(link);
+                    link.click();
+                    document.body.removeChild(link);
 
-                # 处理出现次数
-                count_info = title_data.get("count", 1)
-                if count_info > 1:
-                    stats_html += f'<span class="count-info">{count_info}次</span>'
+                    button.textContent = '保存成功!';
+                    setTimeout(() => {
+                        button.textContent = originalText;
+                        button.disabled = false;
+                    }, 2000);
 
-                stats_html += """
-                            </div>
-                            <div class="news-title">"""
+                } catch (error) {
+                    const buttons = document.querySelector('.save-buttons');
+                    buttons.style.visibility = 'visible';
+                    button.textContent = '保存失败';
+                    setTimeout(() => {
+                        button.textContent = originalText;
+                        button.disabled = false;
+                    }, 2000);
+                } finally {
+                    document.body.classList.remove('exporting-image');
+                }
+            }
 
-                # 处理标题和链接
-                escaped_title = html_escape(title_data["title"])
-                link_url = title_data.get("mobile_url") or title_data.get("url", "")
+            async function saveAsMultipleImages() {
+                const button = event.target;
+                const originalText = button.textContent;
+                const container = document.querySelector('.container');
+                const scale = 1.5;
+                const maxHeight = 5000 / scale;
 
-                if link_url:
-                    escaped_url = html_escape(link_url)
-                    stats_html += f'<a href="{escaped_url}" target="_blank" class="news-link">{escaped_title}</a>'
-                else:
-                    stats_html += escaped_title
+                try {
+                    button.textContent = '分析中...';
+                    button.disabled = true;
+                    document.body.classList.add('exporting-image');
+                    ensureChartsBuilt();
 
-                stats_html += """
-                            </div>
-                        </div>
-                    </div>"""
+                    // 获取所有可能的分割元素
+                    const newsItems = Array.from(container.querySelectorAll('.news-item'));
+                    const wordGroups = Array.from(container.querySelectorAll('.word-group'));
+                    const newSection = container.querySelector('.new-section');
+                    const errorSection = container.querySelector('.error-section');
+                    const header = container.querySelector('.header');
+                    const footer = container.querySelector('.footer');
 
-            stats_html += """
-                </div>"""
+                    // 计算元素位置和高度
+                    const containerRect = container.getBoundingClientRect();
+                    const elements = [];
 
-    # 给热榜统计添加外层包装
-    if stats_html:
-        stats_html = f"""
-                <div class="hotlist-section">{stats_html}
-                </div>"""
+                    // 添加header作为必须包含的元素
+                    elements.push({
+                        type: 'header',
+                        element: header,
+                        top: 0,
+                        bottom: header.offsetHeight,
+                        height: header.offsetHeight
+                    });
 
-    # 生成新增新闻区域的HTML
-    new_titles_html = ""
-    if show_new_section and report_data["new_titles"]:
-        new_titles_html += f"""
-                <div class="new-section">
-                    <div class="new-section-title">本次新增热点 (共 {report_data['total_new_count']} 条)</div>"""
+                    // 添加错误信息（如果存在）
+                    if (errorSection) {
+                        const rect = errorSection.getBoundingClientRect();
+                        elements.push({
+                            type: 'error',
+                            element: errorSection,
+                            top: rect.top - containerRect.top,
+                            bottom: rect.bottom - containerRect.top,
+                            height: rect.height
+                        });
+                    }
 
-        for source_data in report_data["new_titles"]:
-            escaped_source = html_escape(source_data["source_name"])
-            titles_count = len(source_data["titles"])
+                    // 按word-group分组处理news-item
+                    wordGroups.forEach(group => {
+                        const groupRect = group.getBoundingClientRect();
+                        const groupNewsItems = group.querySelectorAll('.news-item');
 
-            new_titles_html += f"""
-                    <div class="new-source-group">
-                        <div class="new-source-title">{escaped_source} · {titles_count}条</div>"""
+                        // 添加word-group的header部分
+                        const wordHeader = group.querySelector('.word-header');
+                        if (wordHeader) {
+                            const headerRect = wordHeader.getBoundingClientRect();
+                            elements.push({
+                                type: 'word-header',
+                                element: wordHeader,
+                                parent: group,
+                                top: groupRect.top - containerRect.top,
+                                bottom: headerRect.bottom - containerRect.top,
+                                height: headerRect.height
+                            });
+                        }
 
-            # 为新增新闻也添加序号
-            for idx, title_data in enumerate(source_data["titles"], 1):
-                ranks = title_data.get("ranks", [])
+                        // 添加每个news-item
+                        groupNewsItems.forEach(item => {
+                            const rect = item.getBoundingClientRect();
+                            elements.push({
+                                type: 'news-item',
+                                element: item,
+                                parent: group,
+                                top: rect.top - containerRect.top,
+                                bottom: rect.bottom - containerRect.top,
+                                height: rect.height
+                            });
+                        });
+                    });
 
-                # 处理新增新闻的排名显示
-                rank_class = ""
-                if ranks:
-                    min_rank = min(ranks)
-                    if min_rank <= 3:
-                        rank_class = "top"
-                    elif min_rank <= title_data.get("rank_threshold", 10):
-                        rank_class = "high"
+                    // 添加新增新闻部分
+                    if (newSection) {
+                        const rect = newSection.getBoundingClientRect();
+                        elements.push({
+                            type: 'new-section',
+                            element: newSection,
+                            top: rect.top - containerRect.top,
+                            bottom: rect.bottom - containerRect.top,
+                            height: rect.height
+                        });
+                    }
 
-                    if len(ranks) == 1:
-                        rank_text = str(ranks[0])
-                    else:
-                        rank_text = f"{min(ranks)}-{max(ranks)}"
-                else:
-                    rank_text = "?"
+                    // 添加footer
+                    const footerRect = footer.getBoundingClientRect();
+                    elements.push({
+                        type: 'footer',
+                        element: footer,
+                        top: footerRect.top - containerRect.top,
+                        bottom: footerRect.bottom - containerRect.top,
+                        height: footer.offsetHeight
+                    });
 
-                new_titles_html += f"""
-                        <div class="new-item">
-                            <div class="new-item-number">{idx}</div>
-                            <div class="new-item-rank {rank_class}">{rank_text}</div>
-                            <div class="new-item-content">
-                                <div class="new-item-title">"""
+                    // 计算分割点
+                    const segments = [];
+                    let currentSegment = { start: 0, end: 0, height: 0, includeHeader: true };
+                    let headerHeight = header.offsetHeight;
+                    currentSegment.height = headerHeight;
 
-                # 处理新增新闻的链接
-                escaped_title = html_escape(title_data["title"])
-                link_url = title_data.get("mobile_url") or title_data.get("url", "")
+                    for (let i = 1; i < elements.length; i++) {
+                        const element = elements[i];
+                        const potentialHeight = element.bottom - currentSegment.start;
 
-                if link_url:
-                    escaped_url = html_escape(link_url)
-                    new_titles_html += f'<a href="{escaped_url}" target="_blank" class="news-link">{escaped_title}</a>'
-                else:
-                    new_titles_html += escaped_title
+                        // 检查是否需要创建新分段
+                        if (potentialHeight > maxHeight && currentSegment.height > headerHeight) {
+                            // 在前一个元素结束处分割
+                            currentSegment.end = elements[i - 1].bottom;
+                            segments.push(currentSegment);
 
-                new_titles_html += """
-                                </div>
-                            </div>
-                        </div>"""
+                            // 开始新分段
+                            currentSegment = {
+                                start: currentSegment.end,
+                                end: 0,
+                                height: element.bottom - currentSegment.end,
+                                includeHeader: false
+                            };
+                        } else {
+                            currentSegment.height = potentialHeight;
+                            currentSegment.end = element.bottom;
+                        }
+                    }
 
-            new_titles_html += """
-                    </div>"""
-
-        new_titles_html += """
-                </div>"""
-
-    # 生成 RSS 统计内容
-    def render_rss_stats_html(stats: List[Dict], title: str = "RSS 订阅更新") -> str:
-        """渲染 RSS 统计区块 HTML
-
-        Args:
-            stats: RSS 分组统计列表，格式与热榜一致：
-                [
-                    {
-                        "word": "关键词",
-                        "count": 5,
-                        "titles": [
-                            {
-                                "title": "标题",
-                                "source_name": "Feed 名称",
-                                "time_display": "12-29 08:20",
-                                "url": "...",
-                                "is_new": True/False
-                            }
-                        ]
+                    // 添加最后一个分段
+                    if (currentSegment.height > 0) {
+                        currentSegment.end = container.offsetHeight;
+                        segments.push(currentSegment);
                     }
-                ]
-            title: 区块标题
-
-        Returns:
-            渲染后的 HTML 字符串
-        """
-        if not stats:
-            return ""
-
-        # 计算总条目数
-        total_count = sum(stat.get("count", 0) for stat in stats)
-        if total_count == 0:
-            return ""
-
-        rss_html = f"""
-                <div class="rss-section">
-                    <div class="rss-section-header">
-                        <div class="rss-section-title">{title}</div>
-                        <div class="rss-section-count">{total_count} 条</div>
-                    </div>"""
-
-        # 按关键词分组渲染（与热榜格式一致）
-        for stat in stats:
-            keyword = stat.get("word", "")
-            titles = stat.get("titles", [])
-            if not titles:
-                continue
-
-            keyword_count = len(titles)
-
-            rss_html += f"""
-                    <div class="feed-group">
-                        <div class="feed-header">
-                            <div class="feed-name">{html_escape(keyword)}</div>
-                            <div class="feed-count">{keyword_count} 条</div>
-                        </div>"""
-
-            for title_data in titles:
-                item_title = title_data.get("title", "")
-                url = title_data.get("url", "")
-                time_display = title_data.get("time_display", "")
-                source_name = title_data.get("source_name", "")
-                is_new = title_data.get("is_new", False)
-
-                rss_html += """
-                        <div class="rss-item">
-                            <div class="rss-meta">"""
-
-                if time_display:
-                    rss_html += f'<span class="rss-time">{html_escape(time_display)}</span>'
-
-                if source_name:
-                    rss_html += f'<span class="rss-author">{html_escape(source_name)}</span>'
-
-                if is_new:
-                    rss_html += '<span class="rss-author" style="color: #dc2626;">NEW</span>'
-
-                rss_html += """
-                            </div>
-                            <div class="rss-title">"""
 
-                escaped_title = html_escape(item_title)
-                if url:
-                    escaped_url = html_escape(url)
-                    rss_html += f'<a href="{escaped_url}" target="_blank" class="rss-link">{escaped_title}</a>'
-                else:
-                    rss_html += escaped_title
+                    button.textContent = `生成中 (0/${segments.length})...`;
 
-                rss_html += """
-                            </div>
-                        </div>"""
+                    // 隐藏保存按钮
+                    const buttons = document.querySelector('.save-buttons');
+                    buttons.style.visibility = 'hidden';
 
-            rss_html += """
-                    </div>"""
+                    // 为每个分段生成图片
+                    const images = [];
+                    for (let i = 0; i < segments.length; i++) {
+                        const segment = segments[i];
+                        button.textContent = `生成中 (${i + 1}/${segments.length})...`;
 
-        rss_html += """
-                </div>"""
-        return rss_html
+                        // 创建临时容器用于截图
+                        const tempContainer = document.createElement('div');
+                        tempContainer.style.cssText = `
+                            position: absolute;
+                            left: -9999px;
+                            top: 0;
+                            width: ${container.offsetWidth}px;
+                            background: white;
+                        `;
+                        tempContainer.className = 'container';
 
-    # 生成独立展示区内容
-    def render_standalone_html(data: Optional[Dict]) -> str:
-        """渲染独立展示区 HTML（复用热点词汇统计区样式）
+                        // 克隆容器内容
+                        const clonedContainer = container.cloneNode(true);
 
-        Args:
-            data: 独立展示数据，格式：
-                {
-                    "platforms": [
-                        {
-                            "id": "zhihu",
-                            "name": "知乎热榜",
-                            "items": [
-                                {
-                                    "title": "标题",
-                                    "url": "链接",
-                                    "rank": 1,
-                                    "ranks": [1, 2, 1],
-                                    "first_time": "08:00",
-                                    "last_time": "12:30",
-                                    "count": 3,
-                                }
-                            ]
-                        }
-                    ],
-                    "rss_feeds": [
-                        {
-                            "id": "hacker-news",
-                            "name": "Hacker News",
-                            "items": [
-                                {
-                                    "title": "标题",
-                                    "url": "链接",
-                                    "published_at": "2025-01-07T08:00:00",
-                                    "author": "作者",
-                                }
-                            ]
+                        // 移除克隆内容中的保存按钮
+                        const clonedButtons = clonedContainer.querySelector('.save-buttons');
+                        if (clonedButtons) {
+                            clonedButtons.style.display = 'none';
                         }
-                    ]
-                }
-
-        Returns:
-            渲染后的 HTML 字符串
-        """
-        if not data:
-            return ""
 
-        platforms = data.get("platforms", [])
-        rss_feeds = data.get("rss_feeds", [])
+                        tempContainer.appendChild(clonedContainer);
+                        document.body.appendChild(tempContainer);
 
-        if not platforms and not rss_feeds:
-            return ""
+                        // 等待DOM更新
+                        await new Promise(resolve => setTimeout(resolve, 100));
 
-        # 计算总条目数
-        total_platform_items = sum(len(p.get("items", [])) for p in platforms)
-        total_rss_items = sum(len(f.get("items", [])) for f in rss_feeds)
-        total_count = total_platform_items + total_rss_items
+                        // 使用html2canvas截取特定区域
+                        const canvas = await html2canvas(clonedContainer, {
+                            backgroundColor: '#ffffff',
+                            scale: scale,
+                            useCORS: true,
+                            allowTaint: false,
+                            imageTimeout: 10000,
+                            logging: false,
+                            width: container.offsetWidth,
+                            height: segment.end - segment.start,
+                            x: 0,
+                            y: segment.start,
+                            windowWidth: window.innerWidth,
+                            windowHeight: window.innerHeight
+                        });
 
-        if total_count == 0:
-            return ""
+                        images.push(canvas.toDataURL('image/png', 1.0));
 
-        standalone_html = f"""
-                <div class="standalone-section">
-                    <div class="standalone-section-header">
-                        <div class="standalone-section-title">独立展示区</div>
-                        <div class="standalone-section-count">{total_count} 条</div>
-                    </div>"""
+                        // 清理临时容器
+                        document.body.removeChild(tempContainer);
+                    }
 
-        # 渲染热榜平台（复用 word-group 结构）
-        for platform in platforms:
-            platform_name = platform.get("name", platform.get("id", ""))
-            items = platform.get("items", [])
-            if not items:
-                continue
+                    // 恢复按钮显示
+                    buttons.style.visibility = 'visible';
 
-            standalone_html += f"""
-                    <div class="standalone-group">
-                        <div class="standalone-header">
-                            <div class="standalone-name">{html_escape(platform_name)}</div>
-                            <div class="standalone-count">{len(items)} 条</div>
-                        </div>"""
+                    // 下载所有图片
+                    const now = new Date();
+                    const baseFilename = `TrendRadar_热点新闻分析_${now.getFullYear()}${String(now.getMonth() + 1).padStart(2, '0')}${String(now.getDate()).padStart(2, '0')}_${String(now.getHours()).padStart(2, '0')}${String(now.getMinutes()).padStart(2, '0')}`;
 
-            # 渲染每个条目（复用 news-item 结构）
-            for j, item in enumerate(items, 1):
-                title = item.get("title", "")
-                url = item.get("url", "") or item.get("mobileUrl", "")
-                rank = item.get("rank", 0)
-                ranks = item.get("ranks", [])
-                first_time = item.get("first_time", "")
-                last_time = item.get("last_time", "")
-                count = item.get("count", 1)
+                    for (let i = 0; i < images.length; i++) {
+                        const link = document.createElement('a');
+                        link.download = `${baseFilename}_part${i + 1}.png`;
+                        link.href = images[i];
+                        document.body.appendChild(link);
+                        link.click();
+                        document.body.removeChild(link);
 
-                standalone_html += f"""
-                        <div class="news-item">
-                            <div class="news-number">{j}</div>
-                            <div class="news-content">
-                                <div class="news-header">"""
+                        // 延迟一下避免浏览器阻止多个下载
+                        await new Promise(resolve => setTimeout(resolve, 100));
+                    }
 
-                # 排名显示（复用 rank-num 样式，无 # 前缀）
-                if ranks:
-                    min_rank = min(ranks)
-                    max_rank = max(ranks)
+                    button.textContent = `已保存 ${segments.length} 张图片!`;
+                    setTimeout(() => {
+                        button.textContent = originalText;
+                        button.disabled = false;
+                    }, 2000);
 
-                    # 确定排名等级
-                    if min_rank <= 3:
-                        rank_class = "top"
-                    elif min_rank <= 10:
-                        rank_class = "high"
-                    else:
-                        rank_class = ""
-
-                    if min_rank == max_rank:
-                        rank_text = str(min_rank)
-                    else:
-                        rank_text = f"{min_rank}-{max_rank}"
-
-                    standalone_html += f'<span class="rank-num {rank_class}">{rank_text}</span>'
-                elif rank > 0:
-                    if rank <= 3:
-                        rank_class = "top"
-                    elif rank <= 10:
-                        rank_class = "high"
-                    else:
-                        rank_class = ""
-                    standalone_html += f'<span class="rank-num {rank_class}">{rank}</span>'
-
-                # 时间显示（复用 time-info 样式，将 HH-MM 转换为 HH:MM）
-                if first_time and last_time and first_time != last_time:
-                    first_time_display = convert_time_for_display(first_time)
-                    last_time_display = convert_time_for_display(last_time)
-                    standalone_html += f'<span class="time-info">{html_escape(first_time_display)}~{html_escape(last_time_display)}</span>'
-                elif first_time:
-                    first_time_display = convert_time_for_display(first_time)
-                    standalone_html += f'<span class="time-info">{html_escape(first_time_display)}</span>'
-
-                # 出现次数（复用 count-info 样式）
-                if count > 1:
-                    standalone_html += f'<span class="count-info">{count}次</span>'
-
-                standalone_html += """
-                                </div>
-                                <div class="news-title">"""
-
-                # 标题和链接（复用 news-link 样式）
-                escaped_title = html_escape(title)
-                if url:
-                    escaped_url = html_escape(url)
-                    standalone_html += f'<a href="{escaped_url}" target="_blank" class="news-link">{escaped_title}</a>'
-                else:
-                    standalone_html += escaped_title
-
-                standalone_html += """
-                                </div>
-                            </div>
-                        </div>"""
-
-            standalone_html += """
-                    </div>"""
-
-        # 渲染 RSS 源（复用相同结构）
-        for feed in rss_feeds:
-            feed_name = feed.get("name", feed.get("id", ""))
-            items = feed.get("items", [])
-            if not items:
-                continue
-
-            standalone_html += f"""
-                    <div class="standalone-group">
-                        <div class="standalone-header">
-                            <div class="standalone-name">{html_escape(feed_name)}</div>
-                            <div class="standalone-count">{len(items)} 条</div>
-                        </div>"""
-
-            for j, item in enumerate(items, 1):
-                title = item.get("title", "")
-                url = item.get("url", "")
-                published_at = item.get("published_at", "")
-                author = item.get("author", "")
-
-                standalone_html += f"""
-                        <div class="news-item">
-                            <div class="news-number">{j}</div>
-                            <div class="news-content">
-                                <div class="news-header">"""
-
-                # 时间显示（格式化 ISO 时间）
-                if published_at:
-                    try:
-                        from datetime import datetime as dt
-                        if "T" in published_at:
-                            dt_obj = dt.fromisoformat(published_at.replace("Z", "+00:00"))
-                            time_display = dt_obj.strftime("%m-%d %H:%M")
-                        else:
-                            time_display = published_at
-                    except:
-                        time_display = published_at
-
-                    standalone_html += f'<span class="time-info">{html_escape(time_display)}</span>'
-
-                # 作者显示
-                if author:
-                    standalone_html += f'<span class="source-name">{html_escape(author)}</span>'
-
-                standalone_html += """
-                                </div>
-                                <div class="news-title">"""
-
-                escaped_title = html_escape(title)
-                if url:
-                    escaped_url = html_escape(url)
-                    standalone_html += f'<a href="{escaped_url}" target="_blank" class="news-link">{escaped_title}</a>'
-                else:
-                    standalone_html += escaped_title
-
-                standalone_html += """
-                                </div>
-                            </div>
-                        </div>"""
-
-            standalone_html += """
-                    </div>"""
-
-        standalone_html += """
-                </div>"""
-        return standalone_html
-
-    # 生成 RSS 统计和新增 HTML
-    rss_stats_html = render_rss_stats_html(rss_items, "RSS 订阅更新") if rss_items else ""
-    rss_new_html = render_rss_stats_html(rss_new_items, "RSS 新增更新") if rss_new_items else ""
-
-    # 生成独立展示区 HTML
-    standalone_html = render_standalone_html(standalone_data)
-
-    # 生成 AI 分析 HTML
-    ai_html = render_ai_analysis_html_rich(ai_analysis) if ai_analysis else ""
-
-    # 准备各区域内容映射
-    region_contents = {
-        "hotlist": stats_html,
-        "rss": rss_stats_html,
-        "new_items": (new_titles_html, rss_new_html),  # 元组，分别处理
-        "standalone": standalone_html,
-        "ai_analysis": ai_html,
-    }
-
-    def add_section_divider(content: str) -> str:
-        """为内容的外层 div 添加 section-divider 类"""
-        if not content or 'class="' not in content:
-            return content
-        first_class_pos = content.find('class="')
-        if first_class_pos != -1:
-            insert_pos = first_class_pos + len('class="')
-            return content[:insert_pos] + "section-divider " + content[insert_pos:]
-        return content
-
-    # 按 region_order 顺序组装内容，动态添加分割线
-    has_previous_content = False
-    for region in region_order:
-        content = region_contents.get(region, "")
-        if region == "new_items":
-            # 特殊处理 new_items 区域（包含热榜新增和 RSS 新增两部分）
-            new_html, rss_new = content
-            if new_html:
-                if has_previous_content:
-                    new_html = add_section_divider(new_html)
-                html += new_html
-                has_previous_content = True
-            if rss_new:
-                if has_previous_content:
-                    rss_new = add_section_divider(rss_new)
-                html += rss_new
-                has_previous_content = True
-        elif content:
-            if has_previous_content:
-                content = add_section_divider(content)
-            html += content
-            has_previous_content = True
-
-    html += """
-            </div>
-
-            <div class="footer">
-                <div class="footer-content">
-                    由 <span class="project-name">TrendRadar</span> 生成 ·
-                    <a href="https://github.com/sansan0/TrendRadar" target="_blank" class="footer-link">
-                        GitHub 开源项目
-                    </a>"""
-
-    if update_info:
-        html += f"""
-                    <br>
-                    <span style="color: #ea580c; font-weight: 500;">
-                        发现新版本 {update_info['remote_version']}，当前版本 {update_info['current_version']}
-                    </span>"""
-
-    html += """
-                </div>
-            </div>
-        </div>
-
-        <!-- AI 对话浮动按钮 -->
-        <button class="chat-fab" onclick="toggleChatWindow()" title="AI 智能对话">
-            💬
-        </button>
-
-        <!-- AI 对话窗口 -->
-        <div class="chat-window" id="chatWindow">
-            <div class="chat-header">
-                <div class="chat-header-title">
-                    <span>🤖</span>
-                    <span>AI 智能助手</span>
-                </div>
-                <div class="chat-header-actions">
-                    <button class="chat-header-btn" onclick="toggleChatSettings()" title="设置">⚙️</button>
-                    <button class="chat-header-btn" onclick="clearChatHistory()" title="清空">🗑️</button>
-                    <button class="chat-header-btn" onclick="toggleChatWindow()" title="关闭">✕</button>
-                </div>
-            </div>
-
-            <div class="chat-settings" id="chatSettings">
-                <div class="chat-settings-title">API 配置</div>
-                <div class="chat-settings-group">
-                    <label class="chat-settings-label">AI 提供商</label>
-                    <select class="chat-settings-select" id="chatProvider">
-                        <option value="deepseek">DeepSeek</option>
-                        <option value="openai">OpenAI</option>
-                        <option value="anthropic">Anthropic</option>
-                        <option value="custom">自定义</option>
-                    </select>
-                </div>
-                <div class="chat-settings-group">
-                    <label class="chat-settings-label">API Key</label>
-                    <input type="password" class="chat-settings-input" id="chatApiKey" placeholder="输入你的 API Key">
-                </div>
-                <div class="chat-settings-group" id="customBaseUrlGroup" style="display:none;">
-                    <label class="chat-settings-label">自定义 Base URL</label>
-                    <input type="text" class="chat-settings-input" id="chatBaseUrl" placeholder="https://api.example.com/v1">
-                </div>
-                <div class="chat-settings-group">
-                    <label class="chat-settings-label">MCP Server 地址</label>
-                    <input type="text" class="chat-settings-input" id="mcpServerUrl" placeholder="http://127.0.0.1:3333" value="http://127.0.0.1:3333">
-                </div>
-                <button class="chat-settings-save" onclick="saveChatSettings()">保存设置</button>
-            </div>
-
-            <div class="chat-messages" id="chatMessages">
-                <div class="chat-message system">
-                    👋 你好！我是 TrendRadar AI 助手。我可以帮你分析热点新闻、查询历史数据、推荐关注话题。请先在设置中配置 API Key。
-                </div>
-            </div>
-
-            <div class="chat-quick-actions">
-                <button class="chat-quick-btn" onclick="sendQuickMessage('今日热点有哪些？')">📊 今日热点</button>
-                <button class="chat-quick-btn" onclick="sendQuickMessage('分析当前新闻趋势')">📈 趋势分析</button>
-                <button class="chat-quick-btn" onclick="sendQuickMessage('推荐值得关注的话题')">💡 智能推荐</button>
-                <button class="chat-quick-btn" onclick="sendQuickMessage('总结今天的重要新闻')">📝 新闻摘要</button>
-            </div>
-
-            <div class="chat-input-area">
-                <input type="text" class="chat-input" id="chatInput" placeholder="输入消息..." onkeypress="handleChatKeypress(event)">
-                <button class="chat-send-btn" onclick="sendChatMessage()" id="chatSendBtn">➤</button>
-            </div>
-        </div>
-
-        <script>
-            async function saveAsImage() {
-                const button = event.target;
-                const originalText = button.textContent;
-
-                try {
-                    button.textContent = '生成中...';
-                    button.disabled = true;
-                    window.scrollTo(0, 0);
-
-                    // 等待页面稳定
-                    await new Promise(resolve => setTimeout(resolve, 200));
-
-                    // 截图前隐藏按钮
-                    const buttons = document.querySelector('.save-buttons');
-                    buttons.style.visibility = 'hidden';
-
-                    // 再次等待确保按钮完全隐藏
-                    await new Promise(resolve => setTimeout(resolve, 100));
-
-                    const container = document.querySelector('.container');
-
-                    const canvas = await html2canvas(container, {
-                        backgroundColor: '#ffffff',
-                        scale: 1.5,
-                        useCORS: true,
-                        allowTaint: false,
-                        imageTimeout: 10000,
-                        removeContainer: false,
-                        foreignObjectRendering: false,
-                        logging: false,
-                        width: container.offsetWidth,
-                        height: container.offsetHeight,
-                        x: 0,
-                        y: 0,
-                        scrollX: 0,
-                        scrollY: 0,
-                        windowWidth: window.innerWidth,
-                        windowHeight: window.innerHeight
-                    });
-
-                    buttons.style.visibility = 'visible';
-
-                    const link = document.createElement('a');
-                    const now = new Date();
-                    const filename = `TrendRadar_热点新闻分析_${now.getFullYear()}${String(now.getMonth() + 1).padStart(2, '0')}${String(now.getDate()).padStart(2, '0')}_${String(now.getHours()).padStart(2, '0')}${String(now.getMinutes()).padStart(2, '0')}.png`;
-
-                    link.download = filename;
-                    link.href = canvas.toDataURL('image/png', 1.0);
-
-                    // 触发下载
-                    document.body.appendChild(link);
-                    link.click();
-                    document.body.removeChild(link);
-
-                    button.textContent = '保存成功!';
-                    setTimeout(() => {
-                        button.textContent = originalText;
-                        button.disabled = false;
-                    }, 2000);
-
-                } catch (error) {
-                    const buttons = document.querySelector('.save-buttons');
-                    buttons.style.visibility = 'visible';
-                    button.textContent = '保存失败';
-                    setTimeout(() => {
-                        button.textContent = originalText;
-                        button.disabled = false;
-                    }, 2000);
-                }
-            }
-
-            async function saveAsMultipleImages() {
-                const button = event.target;
-                const originalText = button.textContent;
-                const container = document.querySelector('.container');
-                const scale = 1.5;
-                const maxHeight = 5000 / scale;
-
-                try {
-                    button.textContent = '分析中...';
-                    button.disabled = true;
-
-                    // 获取所有可能的分割元素
-                    const newsItems = Array.from(container.querySelectorAll('.news-item'));
-                    const wordGroups = Array.from(container.querySelectorAll('.word-group'));
-                    const newSection = container.querySelector('.new-section');
-                    const errorSection = container.querySelector('.error-section');
-                    const header = container.querySelector('.header');
-                    const footer = container.querySelector('.footer');
-
-                    // 计算元素位置和高度
-                    const containerRect = container.getBoundingClientRect();
-                    const elements = [];
-
-                    // 添加header作为必须包含的元素
-                    elements.push({
-                        type: 'header',
-                        element: header,
-                        top: 0,
-                        bottom: header.offsetHeight,
-                        height: header.offsetHeight
-                    });
-
-                    // 添加错误信息（如果存在）
-                    if (errorSection) {
-                        const rect = errorSection.getBoundingClientRect();
-                        elements.push({
-                            type: 'error',
-                            element: errorSection,
-                            top: rect.top - containerRect.top,
-                            bottom: rect.bottom - containerRect.top,
-                            height: rect.height
-                        });
-                    }
-
-                    // 按word-group分组处理news-item
-                    wordGroups.forEach(group => {
-                        const groupRect = group.getBoundingClientRect();
-                        const groupNewsItems = group.querySelectorAll('.news-item');
-
-                        // 添加word-group的header部分
-                        const wordHeader = group.querySelector('.word-header');
-                        if (wordHeader) {
-                            const headerRect = wordHeader.getBoundingClientRect();
-                            elements.push({
-                                type: 'word-header',
-                                element: wordHeader,
-                                parent: group,
-                                top: groupRect.top - containerRect.top,
-                                bottom: headerRect.bottom - containerRect.top,
-                                height: headerRect.height
-                            });
-                        }
-
-                        // 添加每个news-item
-                        groupNewsItems.forEach(item => {
-                            const rect = item.getBoundingClientRect();
-                            elements.push({
-                                type: 'news-item',
-                                element: item,
-                                parent: group,
-                                top: rect.top - containerRect.top,
-                                bottom: rect.bottom - containerRect.top,
-                                height: rect.height
-                            });
-                        });
-                    });
-
-                    // 添加新增新闻部分
-                    if (newSection) {
-                        const rect = newSection.getBoundingClientRect();
-                        elements.push({
-                            type: 'new-section',
-                            element: newSection,
-                            top: rect.top - containerRect.top,
-                            bottom: rect.bottom - containerRect.top,
-                            height: rect.height
-                        });
-                    }
-
-                    // 添加footer
-                    const footerRect = footer.getBoundingClientRect();
-                    elements.push({
-                        type: 'footer',
-                        element: footer,
-                        top: footerRect.top - containerRect.top,
-                        bottom: footerRect.bottom - containerRect.top,
-                        height: footer.offsetHeight
-                    });
-
-                    // 计算分割点
-                    const segments = [];
-                    let currentSegment = { start: 0, end: 0, height: 0, includeHeader: true };
-                    let headerHeight = header.offsetHeight;
-                    currentSegment.height = headerHeight;
-
-                    for (let i = 1; i < elements.length; i++) {
-                        const element = elements[i];
-                        const potentialHeight = element.bottom - currentSegment.start;
-
-                        // 检查是否需要创建新分段
-                        if (potentialHeight > maxHeight && currentSegment.height > headerHeight) {
-                            // 在前一个元素结束处分割
-                            currentSegment.end = elements[i - 1].bottom;
-                            segments.push(currentSegment);
-
-                            // 开始新分段
-                            currentSegment = {
-                                start: currentSegment.end,
-                                end: 0,
-                                height: element.bottom - currentSegment.end,
-                                includeHeader: false
-                            };
-                        } else {
-                            currentSegment.height = potentialHeight;
-                            currentSegment.end = element.bottom;
-                        }
-                    }
-
-                    // 添加最后一个分段
-                    if (currentSegment.height > 0) {
-                        currentSegment.end = container.offsetHeight;
-                        segments.push(currentSegment);
-                    }
-
-                    button.textContent = `生成中 (0/${segments.length})...`;
-
-                    // 隐藏保存按钮
-                    const buttons = document.querySelector('.save-buttons');
-                    buttons.style.visibility = 'hidden';
-
-                    // 为每个分段生成图片
-                    const images = [];
-                    for (let i = 0; i < segments.length; i++) {
-                        const segment = segments[i];
-                        button.textContent = `生成中 (${i + 1}/${segments.length})...`;
-
-                        // 创建临时容器用于截图
-                        const tempContainer = document.createElement('div');
-                        tempContainer.style.cssText = `
-                            position: absolute;
-                            left: -9999px;
-                            top: 0;
-                            width: ${container.offsetWidth}px;
-                            background: white;
-                        `;
-                        tempContainer.className = 'container';
-
-                        // 克隆容器内容
-                        const clonedContainer = container.cloneNode(true);
-
-                        // 移除克隆内容中的保存按钮
-                        const clonedButtons = clonedContainer.querySelector('.save-buttons');
-                        if (clonedButtons) {
-                            clonedButtons.style.display = 'none';
-                        }
-
-                        tempContainer.appendChild(clonedContainer);
-                        document.body.appendChild(tempContainer);
-
-                        // 等待DOM更新
-                        await new Promise(resolve => setTimeout(resolve, 100));
-
-                        // 使用html2canvas截取特定区域
-                        const canvas = await html2canvas(clonedContainer, {
-                            backgroundColor: '#ffffff',
-                            scale: scale,
-                            useCORS: true,
-                            allowTaint: false,
-                            imageTimeout: 10000,
-                            logging: false,
-                            width: container.offsetWidth,
-                            height: segment.end - segment.start,
-                            x: 0,
-                            y: segment.start,
-                            windowWidth: window.innerWidth,
-                            windowHeight: window.innerHeight
-                        });
-
-                        images.push(canvas.toDataURL('image/png', 1.0));
-
-                        // 清理临时容器
-                        document.body.removeChild(tempContainer);
-                    }
-
-                    // 恢复按钮显示
-                    buttons.style.visibility = 'visible';
-
-                    // 下载所有图片
-                    const now = new Date();
-                    const baseFilename = `TrendRadar_热点新闻分析_${now.getFullYear()}${String(now.getMonth() + 1).padStart(2, '0')}${String(now.getDate()).padStart(2, '0')}_${String(now.getHours()).padStart(2, '0')}${String(now.getMinutes()).padStart(2, '0')}`;
-
-                    for (let i = 0; i < images.length; i++) {
-                        const link = document.createElement('a');
-                        link.download = `${baseFilename}_part${i + 1}.png`;
-                        link.href = images[i];
-                        document.body.appendChild(link);
-                        link.click();
-                        document.body.removeChild(link);
-
-                        // 延迟一下避免浏览器阻止多个下载
-                        await new Promise(resolve => setTimeout(resolve, 100));
-                    }
-
-                    button.textContent = `已保存 ${segments.length} 张图片!`;
-                    setTimeout(() => {
-                        button.textContent = originalText;
-                        button.disabled = false;
-                    }, 2000);
-
-                } catch (error) {
-                    console.error('分段保存失败:', error);
-                    const buttons = document.querySelector('.save-buttons');
-                    buttons.style.visibility = 'visible';
-                    button.textContent = '保存失败';
-                    setTimeout(() => {
-                        button.textContent = originalText;
-                        button.disabled = false;
-                    }, 2000);
-                }
-            }
+                } catch (error) {
+                    console.error('分段保存失败:', error);
+                    const buttons = document.querySelector('.save-buttons');
+                    buttons.style.visibility = 'visible';
+                    button.textContent = '保存失败';
+                    setTimeout(() => {
+                        button.textContent = originalText;
+                        button.disabled = false;
+                    }, 2000);
+                } finally {
+                    document.body.classList.remove('exporting-image');
+                }
+            }
 
             document.addEventListener('DOMContentLoaded', function() {
                 window.scrollTo(0, 0);
                 
-                // 为所有 word-group 添加折叠功能
-                document.querySelectorAll('.word-header').forEach(header => {
-                    // 添加折叠图标
-                    const icon = document.createElement('span');
-                    icon.className = 'collapse-icon';
-                    icon.textContent = '▼';
-                    header.querySelector('.word-info').appendChild(icon);
-                    
-                    header.addEventListener('click', function() {
-                        const group = this.closest('.word-group');
-                        group.classList.toggle('collapsed');
-                    });
+                // 折叠图标由服务端渲染，点击统一由 document 上的委托监听处理
+                document.addEventListener('click', function(e) {
+                    const header = e.target.closest('.word-header');
+                    if (header) toggleGroup(header.closest('.word-group'));
                 });
                 
                 // 检查是否有保存的暗色模式偏好
@@ -2571,9 +2027,20 @@ def render_html_content(
                 }
             });
             
+            // 标题小写文本缓存（高亮不改变文本内容，跨多次搜索复用）
+            const lowerTextCache = new WeakMap();
+            function getLowerText(element) {
+                let lower = lowerTextCache.get(element);
+                if (lower === undefined) {
+                    lower = element.textContent.toLowerCase();
+                    lowerTextCache.set(element, lower);
+                }
+                return lower;
+            }
+            
             // 搜索功能
             function handleSearch(query) {
-                const searchStats = document.getElementById('searchStats');
+                const searchStats = els.searchStats;
                 query = query.trim().toLowerCase();
                 
                 if (!query) {
@@ -2583,7 +2050,9 @@ def render_html_content(
                     });
                     // 清除高亮
                     document.querySelectorAll('.search-highlight').forEach(el => {
-                        el.outerHTML = el.textContent;
+                        const parent = el.parentNode;
+                        el.replaceWith(el.textContent);
+                        parent.normalize();
                     });
                     searchStats.classList.remove('visible');
                     return;
@@ -2599,7 +2068,7 @@ def render_html_content(
                     group.querySelectorAll('.news-item').forEach(item => {
                         totalItems++;
                         const title = item.querySelector('.news-title');
-                        const titleText = title.textContent.toLowerCase();
+                        const titleText = getLowerText(title);
                         
                         if (titleText.includes(query)) {
                             item.classList.remove('hidden-by-search');
@@ -2615,7 +2084,7 @@ def render_html_content(
                     // 如果组内有匹配，显示组标题
                     if (groupHasMatch) {
                         group.classList.remove('hidden-by-search');
-                        group.classList.remove('collapsed');
+                        expandGroup(group);
                     } else {
                         group.classList.add('hidden-by-search');
                     }
@@ -2628,7 +2097,7 @@ def render_html_content(
                     group.querySelectorAll('.rss-item').forEach(item => {
                         totalItems++;
                         const title = item.querySelector('.rss-title');
-                        const titleText = title.textContent.toLowerCase();
+                        const titleText = getLowerText(title);
                         
                         if (titleText.includes(query)) {
                             item.classList.remove('hidden-by-search');
@@ -2650,7 +2119,7 @@ def render_html_content(
                     group.querySelectorAll('.new-item').forEach(item => {
                         totalItems++;
                         const title = item.querySelector('.new-item-title');
-                        const titleText = title.textContent.toLowerCase();
+                        const titleText = getLowerText(title);
                         
                         if (titleText.includes(query)) {
                             item.classList.remove('hidden-by-search');
@@ -2671,20 +2140,24 @@ def render_html_content(
             }
             
             function highlightText(element, query) {
+                // 在脱离文档的副本上完成清除和包裹，最后一次性替换回页面，避免逐节点触发重排
+                const scratch = element.cloneNode(true);
+                
                 // 先清除已有高亮
-                element.querySelectorAll('.search-highlight').forEach(el => {
-                    el.outerHTML = el.textContent;
+                scratch.querySelectorAll('.search-highlight').forEach(el => {
+                    el.replaceWith(el.textContent);
                 });
+                scratch.normalize();
                 
-                // 获取所有文本节点
-                const walker = document.createTreeWalker(element, NodeFilter.SHOW_TEXT, null, false);
-                const textNodes = [];
-                while(walker.nextNode()) textNodes.push(walker.currentNode);
-                
-                textNodes.forEach(node => {
+                // 边遍历文本节点边处理，不预先收集节点数组
+                const walker = document.createTreeWalker(scratch, NodeFilter.SHOW_TEXT, null, false);
+                const lowerQuery = query.toLowerCase();
+                let node = walker.nextNode();
+                while (node) {
+                    // 替换会使当前节点脱离树，先前进到下一个节点
+                    const next = walker.nextNode();
                     const text = node.textContent;
-                    const lowerText = text.toLowerCase();
-                    const index = lowerText.indexOf(query.toLowerCase());
+                    const index = text.toLowerCase().indexOf(lowerQuery);
                     
                     if (index !== -1) {
                         const before = text.substring(0, index);
@@ -2702,21 +2175,32 @@ def render_html_content(
                         
                         node.parentNode.replaceChild(fragment, node);
                     }
-                });
+                    node = next;
+                }
+                
+                element.replaceChildren(...scratch.childNodes);
             }
             
             // 折叠/展开全部功能
-            let allCollapsed = false;
+            // 全部折叠由 body 上的 all-collapsed 类控制，单组状态用 collapsed / expanded 覆盖
+            function toggleGroup(group) {
+                const allCollapsed = document.body.classList.contains('all-collapsed');
+                group.classList.toggle(allCollapsed ? 'expanded' : 'collapsed');
+            }
+            
+            function expandGroup(group) {
+                group.classList.remove('collapsed');
+                if (document.body.classList.contains('all-collapsed')) {
+                    group.classList.add('expanded');
+                }
+            }
+            
             function toggleAllGroups() {
-                const groups = document.querySelectorAll('.word-group');
-                allCollapsed = !allCollapsed;
+                const allCollapsed = document.body.classList.toggle('all-collapsed');
                 
-                groups.forEach(group => {
-                    if (allCollapsed) {
-                        group.classList.add('collapsed');
-                    } else {
-                        group.classList.remove('collapsed');
-                    }
+                // 清除单组覆盖状态（通常只有少数几组）
+                document.querySelectorAll('.word-group.collapsed, .word-group.expanded').forEach(group => {
+                    group.classList.remove('collapsed', 'expanded');
                 });
                 
                 // 更新按钮文字
@@ -2743,15 +2227,15 @@ def render_html_content(
             
             // 自动刷新功能
             let autoRefreshEnabled = false;
-            let autoRefreshInterval = null;
-            let countdownInterval = null;
+            let countdownFrame = null;
+            let countdownDeadline = 0;
             let countdownSeconds = 300; // 5分钟刷新一次
             
             function toggleAutoRefresh() {
                 autoRefreshEnabled = !autoRefreshEnabled;
-                const btn = document.getElementById('autoRefreshBtn');
-                const countdownEl = document.getElementById('refreshCountdown');
-                const textEl = document.getElementById('autoRefreshText');
+                const btn = els.autoRefreshBtn;
+                const countdownEl = els.refreshCountdown;
+                const textEl = els.autoRefreshText;
                 
                 if (autoRefreshEnabled) {
                     btn.classList.add('auto-refresh-active');
@@ -2771,55 +2255,42 @@ def render_html_content(
             
             function startAutoRefresh() {
                 countdownSeconds = 300;
+                countdownDeadline = performance.now() + countdownSeconds * 1000;
                 updateCountdown();
                 
-                countdownInterval = setInterval(() => {
-                    countdownSeconds--;
-                    updateCountdown();
-                    
-                    if (countdownSeconds <= 0) {
-                        location.reload();
-                    }
-                }, 1000);
+                countdownFrame = requestAnimationFrame(tickCountdown);
             }
             
-            function stopAutoRefresh() {
-                if (countdownInterval) {
-                    clearInterval(countdownInterval);
-                    countdownInterval = null;
+            // 按时间戳计算剩余秒数，仅在显示值变化时更新 DOM（后台标签页由浏览器暂停）
+            function tickCountdown(now) {
+                const remaining = Math.max(0, Math.ceil((countdownDeadline - now) / 1000));
+                if (remaining !== countdownSeconds) {
+                    countdownSeconds = remaining;
+                    updateCountdown();
+                }
+                
+                if (remaining <= 0) {
+                    location.reload();
+                    return;
                 }
+                countdownFrame = requestAnimationFrame(tickCountdown);
             }
             
-            function updateCountdown() {
-                const el = document.getElementById('countdown');
-                if (el) {
-                    const mins = Math.floor(countdownSeconds / 60);
-                    const secs = countdownSeconds % 60;
-                    el.textContent = mins > 0 ? `${mins}:${secs.toString().padStart(2, '0')}` : secs;
+            function stopAutoRefresh() {
+                if (countdownFrame) {
+                    cancelAnimationFrame(countdownFrame);
+                    countdownFrame = null;
                 }
             }
             
-            // 初始化统计数据
-            function initStats() {
-                const totalNews = document.querySelector('.info-value')?.textContent?.match(/\\d+/) || ['--'];
-                document.getElementById('statTotalNews').textContent = totalNews[0];
-                
-                // 计算热点新闻数
-                const hotNews = document.querySelectorAll('.word-group .news-item').length;
-                document.getElementById('statHotNews').textContent = hotNews;
-                
-                // 计算关键词组数
-                const keywords = document.querySelectorAll('.word-group').length;
-                document.getElementById('statKeywords').textContent = keywords;
-                
-                // 计算新增热点数
-                const newItems = document.querySelectorAll('.new-section .new-item').length;
-                document.getElementById('statNewItems').textContent = newItems || 0;
+            function updateCountdown() {
+                const mins = Math.floor(countdownSeconds / 60);
+                const secs = countdownSeconds % 60;
+                els.countdown.textContent = mins > 0 ? `${mins}:${secs.toString().padStart(2, '0')}` : secs;
             }
             
             // 页面加载完成后初始化
             window.addEventListener('load', function() {
-                initStats();
                 initCharts();
                 
                 // 检查是否启用了自动刷新
@@ -2835,15 +2306,56 @@ def render_html_content(
             
             let platformChart = null;
             let keywordChart = null;
+            let chartObserver = null;
+            
+            const chartBuilders = {
+                platformChart: buildPlatformChart,
+                keywordChart: buildKeywordChart
+            };
+            
+            function getChartCanvases() {
+                return Object.keys(chartBuilders)
+                    .map(id => document.getElementById(id))
+                    .filter(Boolean);
+            }
+            
+            // 图表在画布滚动进入视口时才构建，不占用首屏加载时间
+            function initCharts() {
+                const canvases = getChartCanvases();
+                
+                // 不支持 IntersectionObserver 时直接构建
+                if (!('IntersectionObserver' in window)) {
+                    canvases.forEach(canvas => chartBuilders[canvas.id](canvas));
+                    return;
+                }
+                
+                chartObserver = new IntersectionObserver((entries, obs) => {
+                    entries.forEach(entry => {
+                        if (entry.isIntersecting) {
+                            obs.unobserve(entry.target);
+                            chartBuilders[entry.target.id](entry.target);
+                        }
+                    });
+                });
+                canvases.forEach(canvas => chartObserver.observe(canvas));
+            }
+            
+            // 导出图片前构建尚未进入视口的图表（关闭动画，避免截到绘制中途的画面）
+            function ensureChartsBuilt() {
+                if (chartObserver) {
+                    chartObserver.disconnect();
+                    chartObserver = null;
+                }
+                const built = { platformChart, keywordChart };
+                getChartCanvases()
+                    .filter(canvas => !built[canvas.id])
+                    .forEach(canvas => chartBuilders[canvas.id](canvas, false));
+            }
             
-            function initCharts() {
-                // 从嵌入的数据中获取图表数据
-                const platformData = window.chartData?.platform || {};
-                const keywordData = window.chartData?.keywords || [];
-                
-                // 初始化平台分布饼图
-                const platformCtx = document.getElementById('platformChart');
-                if (platformCtx && Object.keys(platformData).length > 0) {
+            // 初始化平台分布饼图
+            function buildPlatformChart(platformCtx, animate = true) {
+                const platformData = getTRData().platform;
+                if (Object.keys(platformData).length > 0) {
                     const labels = Object.keys(platformData);
                     const data = Object.values(platformData);
                     const colors = generateColors(labels.length);
@@ -2861,6 +2373,7 @@ def render_html_content(
                         options: {
                             responsive: true,
                             maintainAspectRatio: false,
+                            ...(animate ? {} : { animation: false }),
                             plugins: {
                                 legend: {
                                     position: 'right',
@@ -2874,16 +2387,15 @@ def render_html_content(
                             }
                         }
                     });
-                } else if (platformCtx) {
+                } else {
                     platformCtx.parentElement.innerHTML = '<div style="display:flex;align-items:center;justify-content:center;height:100%;color:#9ca3af;font-size:14px;">暂无数据</div>';
                 }
-                
-                // 初始化关键词热度柱状图
-                const keywordCtx = document.getElementById('keywordChart');
-                if (keywordCtx && keywordData.length > 0) {
-                    const labels = keywordData.map(k => k.word.length > 8 ? k.word.substring(0, 8) + '...' : k.word);
-                    const data = keywordData.map(k => k.count);
-                    
+            }
+            
+            // 初始化关键词热度柱状图
+            function buildKeywordChart(keywordCtx, animate = true) {
+                const { labels, data } = getTRData().keywords;
+                if (labels.length > 0) {
                     keywordChart = new Chart(keywordCtx, {
                         type: 'bar',
                         data: {
@@ -2898,6 +2410,7 @@ def render_html_content(
                         options: {
                             responsive: true,
                             maintainAspectRatio: false,
+                            ...(animate ? {} : { animation: false }),
                             indexAxis: 'y',
                             plugins: {
                                 legend: { display: false }
@@ -2919,7 +2432,7 @@ def render_html_content(
                             }
                         }
                     });
-                } else if (keywordCtx) {
+                } else {
                     keywordCtx.parentElement.innerHTML = '<div style="display:flex;align-items:center;justify-content:center;height:100%;color:#9ca3af;font-size:14px;">暂无数据</div>';
                 }
             }
@@ -2939,66 +2452,156 @@ def render_html_content(
             
             // ==================== AI 对话功能 ====================
             
+            // 对话历史滚动窗口：入队时即转换为接口所需格式，只保留最近若干条
+            const CHAT_HISTORY_LIMIT = 10;
+            const CHAT_CONTENT_MAX_CHARS = 2000;
             let chatHistory = [];
+            
+            function pushChatHistory(role, content) {
+                chatHistory.push({
+                    role: role === 'user' ? 'user' : 'assistant',
+                    // 截断过长内容，限制单次请求的最大 token 数
+                    content: content.length > CHAT_CONTENT_MAX_CHARS ? content.slice(0, CHAT_CONTENT_MAX_CHARS) : content
+                });
+                if (chatHistory.length > CHAT_HISTORY_LIMIT) chatHistory.shift();
+            }
             let isWaitingResponse = false;
             
+            // 对话设置统一存放在一个 JSON 键中，读取一次后缓存
+            const CHAT_SETTINGS_KEY = 'trChatSettings';
+            const LEGACY_CHAT_SETTING_KEYS = {
+                provider: 'chatProvider',
+                apiKey: 'chatApiKey',
+                baseUrl: 'chatBaseUrl',
+                mcpUrl: 'mcpServerUrl'
+            };
+            const DEFAULT_MCP_URL = 'http://127.0.0.1:3333';
+            let chatSettings = null;
+            let pendingSettingsWrite = null;
+            
+            // 空闲时再写入 localStorage，连续保存只写最后一次
+            const scheduleIdle = window.requestIdleCallback
+                ? (fn) => window.requestIdleCallback(fn, { timeout: 1000 })
+                : (fn) => setTimeout(fn, 0);
+            
+            function flushChatSettings() {
+                if (pendingSettingsWrite === null) return;
+                localStorage.setItem(CHAT_SETTINGS_KEY, pendingSettingsWrite);
+                pendingSettingsWrite = null;
+            }
+            
+            function persistChatSettings(settings) {
+                const alreadyScheduled = pendingSettingsWrite !== null;
+                pendingSettingsWrite = JSON.stringify(settings);
+                if (!alreadyScheduled) scheduleIdle(flushChatSettings);
+            }
+            
+            // 页面关闭前写入尚未落盘的设置
+            window.addEventListener('pagehide', flushChatSettings);
+            
+            // 其他标签页修改设置后，下次读取时重新加载
+            window.addEventListener('storage', function(e) {
+                if (e.key === CHAT_SETTINGS_KEY || e.key === null) {
+                    chatSettings = null;
+                }
+            });
+            
+            function getChatSettings() {
+                if (chatSettings) return chatSettings;
+                
+                let stored = null;
+                try {
+                    stored = JSON.parse(localStorage.getItem(CHAT_SETTINGS_KEY) || 'null');
+                } catch (e) {
+                    stored = null;
+                }
+                
+                if (!stored) {
+                    // 迁移旧版本分散存储的设置（仅执行一次）
+                    // 旧键保留不删：同源的历史报告页面仍从旧键读取设置
+                    stored = {};
+                    let migrated = false;
+                    for (const [name, legacyKey] of Object.entries(LEGACY_CHAT_SETTING_KEYS)) {
+                        const value = localStorage.getItem(legacyKey);
+                        if (value !== null) {
+                            stored[name] = value;
+                            migrated = true;
+                        }
+                    }
+                    if (migrated) {
+                        localStorage.setItem(CHAT_SETTINGS_KEY, JSON.stringify(stored));
+                    }
+                }
+                
+                chatSettings = {
+                    provider: stored.provider || 'deepseek',
+                    apiKey: stored.apiKey || '',
+                    baseUrl: stored.baseUrl || '',
+                    mcpUrl: stored.mcpUrl || DEFAULT_MCP_URL
+                };
+                return chatSettings;
+            }
+            
             // 切换对话窗口
             function toggleChatWindow() {
-                const chatWindow = document.getElementById('chatWindow');
+                const chatWindow = els.chatWindow;
                 chatWindow.classList.toggle('open');
                 
                 if (chatWindow.classList.contains('open')) {
-                    document.getElementById('chatInput').focus();
+                    els.chatInput.focus();
+                } else {
+                    abortPendingChat();
                 }
             }
             
             // 切换设置面板
             function toggleChatSettings() {
-                const settings = document.getElementById('chatSettings');
-                settings.classList.toggle('open');
+                els.chatSettings.classList.toggle('open');
             }
             
             // 初始化对话设置
             function initChatSettings() {
-                const provider = localStorage.getItem('chatProvider') || 'deepseek';
-                const apiKey = localStorage.getItem('chatApiKey') || '';
-                const baseUrl = localStorage.getItem('chatBaseUrl') || '';
-                const mcpUrl = localStorage.getItem('mcpServerUrl') || 'http://127.0.0.1:3333';
+                const { provider, apiKey, baseUrl, mcpUrl } = getChatSettings();
                 
-                document.getElementById('chatProvider').value = provider;
-                document.getElementById('chatApiKey').value = apiKey;
-                document.getElementById('chatBaseUrl').value = baseUrl;
-                document.getElementById('mcpServerUrl').value = mcpUrl;
+                els.chatProvider.value = provider;
+                els.chatApiKey.value = apiKey;
+                els.chatBaseUrl.value = baseUrl;
+                els.mcpServerUrl.value = mcpUrl;
+                
+                // 输入框获得焦点时预热 AI 服务连接
+                els.chatInput.addEventListener('focus', warmUpAIConnection);
                 
                 // 监听提供商变化
-                document.getElementById('chatProvider').addEventListener('change', function() {
-                    const customGroup = document.getElementById('customBaseUrlGroup');
-                    customGroup.style.display = this.value === 'custom' ? 'flex' : 'none';
+                els.chatProvider.addEventListener('change', function() {
+                    els.customBaseUrlGroup.style.display = this.value === 'custom' ? 'flex' : 'none';
                 });
                 
                 // 触发一次变化检测
                 if (provider === 'custom') {
-                    document.getElementById('customBaseUrlGroup').style.display = 'flex';
+                    els.customBaseUrlGroup.style.display = 'flex';
                 }
                 
                 // 如果有 API Key，更新欢迎消息
                 if (apiKey) {
-                    const messagesDiv = document.getElementById('chatMessages');
+                    const messagesDiv = els.chatMessages;
                     messagesDiv.innerHTML = `<div class="chat-message system">👋 欢迎回来！我是 TrendRadar AI 助手。有什么我可以帮你的？</div>`;
                 }
             }
             
             // 保存对话设置
             function saveChatSettings() {
-                const provider = document.getElementById('chatProvider').value;
-                const apiKey = document.getElementById('chatApiKey').value;
-                const baseUrl = document.getElementById('chatBaseUrl').value;
-                const mcpUrl = document.getElementById('mcpServerUrl').value;
+                const provider = els.chatProvider.value;
+                const apiKey = els.chatApiKey.value;
+                const baseUrl = els.chatBaseUrl.value;
+                const mcpUrl = els.mcpServerUrl.value;
                 
-                localStorage.setItem('chatProvider', provider);
-                localStorage.setItem('chatApiKey', apiKey);
-                localStorage.setItem('chatBaseUrl', baseUrl);
-                localStorage.setItem('mcpServerUrl', mcpUrl);
+                chatSettings = {
+                    provider: provider || 'deepseek',
+                    apiKey,
+                    baseUrl,
+                    mcpUrl: mcpUrl || DEFAULT_MCP_URL
+                };
+                persistChatSettings({ provider, apiKey, baseUrl, mcpUrl });
                 
                 toggleChatSettings();
                 addChatMessage('system', '✅ 设置已保存');
@@ -3006,31 +2609,83 @@ def render_html_content(
             
             // 清空对话历史
             function clearChatHistory() {
-                chatHistory = [];
-                const messagesDiv = document.getElementById('chatMessages');
+                abortPendingChat();
+                chatHistory.length = 0;
+                const messagesDiv = els.chatMessages;
                 messagesDiv.innerHTML = `<div class="chat-message system">💬 对话已清空，可以开始新的对话了</div>`;
             }
             
             // 添加消息到对话框
             function addChatMessage(role, content) {
-                const messagesDiv = document.getElementById('chatMessages');
+                const messagesDiv = els.chatMessages;
                 const messageDiv = document.createElement('div');
                 messageDiv.className = `chat-message ${role}`;
-                messageDiv.innerHTML = content.replace(/\\n/g, '<br>');
+                // 按行拼接文本节点和 <br>，不经过 HTML 解析（同时避免内容被当作 HTML 注入）
+                const fragment = document.createDocumentFragment();
+                content.split('\\n').forEach((line, i) => {
+                    if (i) fragment.appendChild(document.createElement('br'));
+                    fragment.appendChild(document.createTextNode(line));
+                });
+                messageDiv.appendChild(fragment);
                 messagesDiv.appendChild(messageDiv);
                 messagesDiv.scrollTop = messagesDiv.scrollHeight;
                 
                 if (role !== 'system' && role !== 'loading') {
-                    chatHistory.push({ role, content });
+                    pushChatHistory(role, content);
                 }
             }
             
+            // 创建流式回复的消息框（内容随响应逐段追加）
+            // 增量文本按帧合并：每帧最多一次 DOM 追加和滚动，避免逐段强制布局占用主线程
+            function createStreamingMessage() {
+                const messageDiv = document.createElement('div');
+                messageDiv.className = 'chat-message assistant';
+                els.chatMessages.appendChild(messageDiv);
+                
+                let pendingText = '';
+                let frame = null;
+                const flush = () => {
+                    if (frame !== null) {
+                        cancelAnimationFrame(frame);
+                        frame = null;
+                    }
+                    if (pendingText) {
+                        appendMessageText(messageDiv, pendingText);
+                        pendingText = '';
+                    }
+                };
+                
+                return {
+                    append(text) {
+                        pendingText += text;
+                        if (frame === null) {
+                            frame = requestAnimationFrame(() => {
+                                frame = null;
+                                flush();
+                            });
+                        }
+                    },
+                    flush
+                };
+            }
+            
+            // 向消息框追加一段文本，换行转为 <br>
+            function appendMessageText(messageDiv, text) {
+                text.split('\\n').forEach((line, i) => {
+                    if (i) messageDiv.appendChild(document.createElement('br'));
+                    if (line) messageDiv.appendChild(document.createTextNode(line));
+                });
+                const messagesDiv = els.chatMessages;
+                messagesDiv.scrollTop = messagesDiv.scrollHeight;
+            }
+            
             // 显示加载动画
+            let loadingMessageEl = null;
             function showLoadingMessage() {
-                const messagesDiv = document.getElementById('chatMessages');
+                const messagesDiv = els.chatMessages;
                 const loadingDiv = document.createElement('div');
                 loadingDiv.className = 'chat-message assistant loading';
-                loadingDiv.id = 'loadingMessage';
+                loadingMessageEl = loadingDiv;
                 loadingDiv.innerHTML = '<span></span><span></span><span></span>';
                 messagesDiv.appendChild(loadingDiv);
                 messagesDiv.scrollTop = messagesDiv.scrollHeight;
@@ -3038,8 +2693,10 @@ def render_html_content(
             
             // 移除加载动画
             function removeLoadingMessage() {
-                const loading = document.getElementById('loadingMessage');
-                if (loading) loading.remove();
+                if (loadingMessageEl) {
+                    loadingMessageEl.remove();
+                    loadingMessageEl = null;
+                }
             }
             
             // 处理键盘事件
@@ -3052,13 +2709,24 @@ def render_html_content(
             
             // 发送快捷消息
             function sendQuickMessage(message) {
-                document.getElementById('chatInput').value = message;
+                els.chatInput.value = message;
                 sendChatMessage();
             }
             
+            // 当前对话请求的中止控制器（关闭窗口、清空对话时中止未完成的网络请求）
+            let chatAbortController = null;
+            
+            function abortPendingChat() {
+                if (chatAbortController) {
+                    chatAbortController.abort();
+                    chatAbortController = null;
+                    removeLoadingMessage();
+                }
+            }
+            
             // 发送对话消息
             async function sendChatMessage() {
-                const input = document.getElementById('chatInput');
+                const input = els.chatInput;
                 const message = input.value.trim();
                 
                 if (!message || isWaitingResponse) return;
@@ -3067,14 +2735,22 @@ def render_html_content(
                 addChatMessage('user', message);
                 input.value = '';
                 
+                // 本轮请求共用一个中止信号（等待回复期间不会发起新一轮，无需中止上一轮）
+                const controller = new AbortController();
+                chatAbortController = controller;
+                
                 // 显示加载状态
                 isWaitingResponse = true;
-                document.getElementById('chatSendBtn').disabled = true;
+                els.chatSendBtn.disabled = true;
                 showLoadingMessage();
                 
+                // 本地 AI 所需的新闻上下文与意图识别、MCP AI 探测并行获取（失败时内部回退页面数据，不会抛出）
+                const newsContextPromise = getChatSettings().apiKey ? getNewsContext() : null;
+                
                 try {
                     // 1. 先尝试使用 MCP 直接处理数据查询
                     const mcpResult = await processWithMCP(message);
+                    if (controller.signal.aborted) return;
                     if (mcpResult) {
                         removeLoadingMessage();
                         addChatMessage('assistant', mcpResult);
@@ -3097,359 +2773,1454 @@ def render_html_content(
                         if (mcpAiResult && !mcpAiResult.success) {
                             console.log('MCP AI 未配置:', mcpAiResult.error);
                         }
-                    } catch (mcpAiError) {
-                        console.log('MCP AI 调用失败，尝试本地配置:', mcpAiError);
-                    }
-                    
-                    // 3. MCP AI 不可用，检查本地 API Key
-                    const apiKey = localStorage.getItem('chatApiKey');
-                    if (!apiKey) {
-                        removeLoadingMessage();
-                        addChatMessage('system', '⚠️ AI 未配置。\\n\\n方式1: 在 docker/.env 中设置 AI_API_KEY（推荐）\\n方式2: 点击右上角 ⚙️ 在此配置 API Key');
-                        return;
+                    } catch (mcpAiError) {
+                        console.log('MCP AI 调用失败，尝试本地配置:', mcpAiError);
+                    }
+                    if (controller.signal.aborted) return;
+                    
+                    // 3. MCP AI 不可用，检查本地 API Key
+                    const apiKey = getChatSettings().apiKey;
+                    if (!apiKey) {
+                        removeLoadingMessage();
+                        addChatMessage('system', '⚠️ AI 未配置。\\n\\n方式1: 在 docker/.env 中设置 AI_API_KEY（推荐）\\n方式2: 点击右上角 ⚙️ 在此配置 API Key');
+                        return;
+                    }
+                    
+                    // 4. 使用本地配置的 AI API
+                    const newsContext = await newsContextPromise;
+                    let stream = null;
+                    const response = await callAIAPI(message, newsContext, (delta) => {
+                        // 收到首段内容时替换加载动画
+                        if (!stream) {
+                            removeLoadingMessage();
+                            stream = createStreamingMessage();
+                        }
+                        stream.append(delta);
+                    });
+                    
+                    removeLoadingMessage();
+                    if (stream) {
+                        stream.flush();
+                        pushChatHistory('assistant', response);
+                    } else {
+                        addChatMessage('assistant', response);
+                    }
+                    
+                } catch (error) {
+                    removeLoadingMessage();
+                    if (error.name !== 'AbortError') {
+                        addChatMessage('system', `❌ 错误: ${error.message}`);
+                    }
+                } finally {
+                    if (chatAbortController === controller) {
+                        chatAbortController = null;
+                    }
+                    isWaitingResponse = false;
+                    els.chatSendBtn.disabled = false;
+                }
+            }
+            
+            // 页面数据回退上下文：页面数据在页面生命周期内不变，首次拼接后复用
+            let pageNewsContext = null;
+            function getPageNewsContext() {
+                if (pageNewsContext === null) {
+                    const { total, items } = getTRData().news;
+                    pageNewsContext = `当前页面包含 ${total} 条热点新闻:\\n` +
+                        items.map(n => `- [${n.keyword}] ${n.title}`).join('\\n');
+                }
+                return pageNewsContext;
+            }
+            
+            // 获取新闻上下文
+            async function getNewsContext() {
+                // 先尝试从 MCP Server 获取最新数据
+                try {
+                    const mcpData = await callMCPTool('get_trending_topics', { top_n: 15 });
+                    if (mcpData && mcpData.topics) {
+                        return `当前热点话题（来自 MCP Server）:\\n` +
+                               mcpData.topics.map(t => `- ${t.keyword}: ${t.frequency} 条相关新闻`).join('\\n');
+                    }
+                } catch (e) {
+                    console.log('MCP Server 不可用，使用页面数据:', e.message);
+                }
+                
+                // 回退：使用页面嵌入的新闻数据
+                return getPageNewsContext();
+            }
+            
+            // 进行中的 MCP 请求：同一轮对话中参数相同的并发调用合并为一次网络请求
+            const pendingMCPCalls = new Map();
+            
+            // 调用 MCP Server 工具
+            function callMCPTool(toolName, params = {}) {
+                const key = `${toolName}|${JSON.stringify(params)}`;
+                let pending = pendingMCPCalls.get(key);
+                if (!pending) {
+                    pending = requestMCPTool(toolName, params).finally(() => {
+                        pendingMCPCalls.delete(key);
+                    });
+                    pendingMCPCalls.set(key, pending);
+                }
+                return pending;
+            }
+            
+            async function requestMCPTool(toolName, params) {
+                const mcpUrl = getChatSettings().mcpUrl;
+                
+                try {
+                    const response = await fetch(`${mcpUrl}/mcp`, {
+                        method: 'POST',
+                        signal: chatAbortController?.signal,
+                        headers: {
+                            'Content-Type': 'application/json'
+                        },
+                        body: JSON.stringify({
+                            jsonrpc: '2.0',
+                            method: 'tools/call',
+                            params: {
+                                name: toolName,
+                                arguments: params
+                            },
+                            id: Date.now()
+                        })
+                    });
+                    
+                    if (!response.ok) {
+                        throw new Error(`MCP 请求失败: ${response.status}`);
+                    }
+                    
+                    const data = await response.json();
+                    if (data.error) {
+                        throw new Error(data.error.message);
+                    }
+                    
+                    // 解析结果：优先使用 structuredContent，已是对象时不再重复解析
+                    // 返回字符串的工具会被包装为 {result: "<JSON 字符串>"}，此时解析其中的字符串
+                    let raw = data.result?.structuredContent;
+                    if (raw && typeof raw === 'object') {
+                        const keys = Object.keys(raw);
+                        if (keys.length === 1 && keys[0] === 'result' && typeof raw.result === 'string') {
+                            raw = raw.result;
+                        }
+                    } else {
+                        raw = data.result?.content?.[0]?.text;
+                    }
+                    if (typeof raw === 'string') {
+                        return raw ? JSON.parse(raw) : null;
+                    }
+                    return raw ?? null;
+                } catch (error) {
+                    console.error('MCP 调用失败:', error);
+                    throw error;
+                }
+            }
+            
+            // 智能意图识别和 MCP 工具调用
+            // 意图正则在脚本加载时编译一次。handler 返回字符串表示已处理，
+            // 返回 null 表示交给 AI，返回 undefined 表示继续匹配后续意图
+            const SEARCH_STRIP_RE = /搜索|查找|找|关于|的新闻|新闻/g;
+            const TOPIC_TREND_RE = /分析[""'']?(.+?)[""'']?的?趋势/;
+            const SENTIMENT_TOPIC_RE = /[关于对]?[""'']?(.+?)[""'']?的?[情感舆情态度]/;
+            const SENTIMENT_STRIP_RE = /[的关于对]/g;
+            
+            // 各意图的关键词组：需命中全部关键词组，组内命中任一关键词即可
+            // 单独输入 "?" 视为帮助（整句匹配，不参与关键词扫描）
+            const HELP_SHORTCUT = '?';
+            const INTENT_KEYWORDS = Object.freeze({
+                search: [['搜索', '查找', '找']],
+                trending: [['热点', '趋势', '热门', '今日']],
+                rss: [['rss', '订阅']],
+                analysis: [['分析'], ['趋势', '话题']],
+                sentiment: [['情感', '舆情', '态度']],
+                platform: [['平台'], ['对比', '比较']],
+                status: [['状态', '系统', '版本']],
+                export: [['导出', '下载']],
+                help: [['帮助', 'help', HELP_SHORTCUT]]
+            });
+            
+            // 所有关键词合成一个正则，一次扫描标出消息中出现的全部关键词
+            // 使用前瞻匹配，每个位置都会检查，关键词重叠时也不会漏掉；长关键词优先
+            const INTENT_KEYWORD_SCAN_RE = new RegExp(
+                '(?=(' +
+                [...new Set(Object.values(INTENT_KEYWORDS).flat().flat())]
+                    .filter(keyword => keyword !== HELP_SHORTCUT)
+                    .sort((a, b) => b.length - a.length)
+                    .join('|') +
+                '))',
+                'gi'
+            );
+            
+            function scanIntentKeywords(message) {
+                const hits = new Set();
+                if (message === HELP_SHORTCUT) hits.add(HELP_SHORTCUT);
+                for (const match of message.matchAll(INTENT_KEYWORD_SCAN_RE)) {
+                    hits.add(match[1].toLowerCase());
+                }
+                return hits;
+            }
+            
+            // 固定回复文本（按意图索引，脚本加载时创建一次）
+            const RESPONSES = Object.freeze({
+                export: '📥 数据导出功能:\\n\\n' +
+                        '你可以使用以下命令导出数据：\\n\\n' +
+                        '• "导出今日新闻" - 导出今天的新闻数据\\n' +
+                        '• "导出 RSS 数据" - 导出 RSS 订阅内容\\n\\n' +
+                        '提示：导出功能需要 MCP Server 支持，请确保服务已启动。',
+                help: '🤖 TrendRadar AI 助手功能：\\n\\n' +
+                      '📊 **数据查询**\\n' +
+                      '• 今日热点 - 查看当前热门话题\\n' +
+                      '• 搜索 [关键词] - 搜索相关新闻\\n' +
+                      '• RSS 订阅 - 查看最新订阅内容\\n\\n' +
+                      '📈 **深度分析**\\n' +
+                      '• 分析 [话题] 的趋势 - 话题趋势分析\\n' +
+                      '• [话题] 的情感/舆情 - 情感倾向分析\\n' +
+                      '• 平台对比 - 各平台活跃度对比\\n\\n' +
+                      '⚙️ **系统功能**\\n' +
+                      '• 系统状态 - 查看系统运行状态\\n' +
+                      '• 帮助 - 显示此帮助信息'
+            });
+            
+            // 按顺序匹配，先命中的意图优先处理
+            const MCP_INTENTS = [
+                {
+                    // 1. 搜索意图
+                    intent: 'search',
+                    handler: async (message) => {
+                        const keyword = message.replace(SEARCH_STRIP_RE, '').trim();
+                        if (!keyword) return undefined;
+                        const result = await callMCPTool('search_news', { 
+                            query: keyword, 
+                            limit: 10 
+                        });
+                        if (result && result.data) {
+                            return `🔍 找到 ${result.summary?.total || 0} 条关于"${keyword}"的新闻:\\n\\n` +
+                                   result.data.slice(0, 10).map((n, i) => 
+                                       `${i+1}. [${n.platform_name}] ${n.title}`
+                                   ).join('\\n');
+                        }
+                    }
+                },
+                {
+                    // 2. 热点/趋势意图
+                    intent: 'trending',
+                    handler: async () => {
+                        // 与 getNewsContext 使用相同参数，并行预取上下文时可共用同一请求
+                        const result = await callMCPTool('get_trending_topics', { top_n: 15 });
+                        if (result && result.topics) {
+                            return `📊 当前热门话题 TOP 10:\\n\\n` +
+                                   result.topics.slice(0, 10).map((t, i) => {
+                                       const icon = i < 3 ? '🔥' : (i < 6 ? '📈' : '📌');
+                                       return `${icon} ${i+1}. ${t.keyword} - ${t.frequency} 条相关新闻`;
+                                   }).join('\\n');
+                        }
+                    }
+                },
+                {
+                    // 3. RSS 订阅意图
+                    intent: 'rss',
+                    handler: async () => {
+                        const result = await callMCPTool('get_latest_rss', { days: 1, limit: 10 });
+                        if (result && result.data) {
+                            return `📰 最新 RSS 订阅内容:\\n\\n` +
+                                   result.data.slice(0, 10).map((r, i) => 
+                                       `${i+1}. [${r.feed_name}] ${r.title}`
+                                   ).join('\\n');
+                        }
+                    }
+                },
+                {
+                    // 4. 深度分析意图
+                    intent: 'analysis',
+                    handler: async (message) => {
+                        // 提取话题关键词
+                        const topicMatch = message.match(TOPIC_TREND_RE);
+                        const topic = topicMatch ? topicMatch[1] : '';
+                        if (!topic) return undefined;
+                        
+                        const result = await callMCPTool('analyze_topic_trend', { 
+                            topic: topic,
+                            analysis_type: 'trend'
+                        });
+                        if (result && result.trend_analysis) {
+                            const ta = result.trend_analysis;
+                            return `📈 "${topic}" 趋势分析:\\n\\n` +
+                                   `• 数据周期: ${ta.date_range?.start || '今天'} 至 ${ta.date_range?.end || '今天'}\\n` +
+                                   `• 相关新闻: ${ta.total_news || 0} 条\\n` +
+                                   `• 趋势方向: ${ta.trend_direction || '稳定'}\\n` +
+                                   (ta.daily_counts ? `• 每日分布: ${JSON.stringify(ta.daily_counts)}` : '');
+                        }
+                    }
+                },
+                {
+                    // 5. 情感分析意图
+                    intent: 'sentiment',
+                    handler: async (message) => {
+                        const topicMatch = message.match(SENTIMENT_TOPIC_RE);
+                        const topic = topicMatch ? topicMatch[1].replace(SENTIMENT_STRIP_RE, '') : '';
+                        if (!topic) return undefined;
+                        
+                        const result = await callMCPTool('analyze_sentiment', { 
+                            topic: topic,
+                            limit: 20
+                        });
+                        if (result && result.sentiment_analysis) {
+                            const sa = result.sentiment_analysis;
+                            return `🎭 "${topic}" 情感分析:\\n\\n` +
+                                   `• 正面: ${sa.positive_ratio || 0}%\\n` +
+                                   `• 中性: ${sa.neutral_ratio || 0}%\\n` +
+                                   `• 负面: ${sa.negative_ratio || 0}%\\n` +
+                                   `• 样本量: ${sa.total_analyzed || 0} 条新闻`;
+                        }
+                    }
+                },
+                {
+                    // 6. 平台对比意图
+                    intent: 'platform',
+                    handler: async () => {
+                        const result = await callMCPTool('analyze_data_insights', { 
+                            insight_type: 'platform_activity'
+                        });
+                        if (result && result.platform_stats) {
+                            const stats = result.platform_stats;
+                            return `📱 平台活跃度对比:\\n\\n` +
+                                   Object.entries(stats)
+                                       .sort((a, b) => b[1].news_count - a[1].news_count)
+                                       .slice(0, 8)
+                                       .map(([ name, data], i) => 
+                                           `${i+1}. ${name}: ${data.news_count} 条新闻`
+                                       ).join('\\n');
+                        }
+                    }
+                },
+                {
+                    // 7. 系统状态意图
+                    intent: 'status',
+                    handler: async () => {
+                        const result = await callMCPTool('get_system_status', {});
+                        if (result && result.system) {
+                            return `⚙️ 系统状态:\\n\\n` +
+                                   `• 版本: ${result.system.version || '未知'}\\n` +
+                                   `• 数据存储: ${result.data?.total_storage || '未知'}\\n` +
+                                   `• 最新数据: ${result.data?.latest_record || '无'}\\n` +
+                                   `• 健康状态: ${result.health || '正常'}`;
+                        }
+                    }
+                },
+                {
+                    // 8. 导出数据意图
+                    intent: 'export',
+                    handler: async () => RESPONSES.export
+                },
+                {
+                    // 9. 帮助意图
+                    intent: 'help',
+                    handler: async () => RESPONSES.help
+                }
+            ];
+            
+            function matchesIntent(intent, hits) {
+                return INTENT_KEYWORDS[intent].every(group => group.some(keyword => hits.has(keyword)));
+            }
+            
+            // 处理单个意图：返回回复文本，无法处理时返回 null
+            async function dispatchIntent(message) {
+                const hits = scanIntentKeywords(message);
+                for (const { intent, handler } of MCP_INTENTS) {
+                    if (!matchesIntent(intent, hits)) continue;
+                    
+                    try {
+                        const reply = await handler(message);
+                        if (reply !== undefined) return reply;
+                    } catch (e) {
+                        return null;
+                    }
+                }
+                
+                return null; // 无法处理，交给 AI
+            }
+            
+            // 多意图消息（如"今日热点，RSS 订阅"）按分隔符拆分，各子查询并发执行
+            const MULTI_INTENT_SPLIT_RE = /[，,、；;+]|和/;
+            const MCP_MAX_CONCURRENCY = 4;
+            
+            // 限制并发数的 map：最多同时执行 limit 个任务，结果按原顺序返回
+            async function mapWithConcurrency(items, limit, fn) {
+                const results = new Array(items.length);
+                let nextIndex = 0;
+                const workers = Array.from({ length: Math.min(limit, items.length) }, async () => {
+                    while (nextIndex < items.length) {
+                        const index = nextIndex++;
+                        results[index] = await fn(items[index]);
+                    }
+                });
+                await Promise.all(workers);
+                return results;
+            }
+            
+            async function processWithMCP(message) {
+                const parts = message.split(MULTI_INTENT_SPLIT_RE).map(part => part.trim()).filter(Boolean);
+                // 每一段都能识别出意图时才按多意图处理，否则整体作为单个意图
+                const isMultiIntent = parts.length > 1 && parts.every(part => {
+                    const hits = scanIntentKeywords(part);
+                    return MCP_INTENTS.some(({ intent }) => matchesIntent(intent, hits));
+                });
+                if (!isMultiIntent) {
+                    return dispatchIntent(message);
+                }
+                
+                const replies = await mapWithConcurrency(parts, MCP_MAX_CONCURRENCY, dispatchIntent);
+                // 任一子查询无法处理时整体交给 AI
+                return replies.every(Boolean) ? replies.join('\\n\\n') : null;
+            }
+            
+            // AI 回复缓存：相同问题 + 相同模型 + 相同新闻上下文时直接复用回复
+            // 以 Map 插入顺序做 LRU，持久化到 localStorage
+            const AI_CACHE_KEY = 'trChatCache';
+            const AI_CACHE_MAX_SIZE = 200;
+            let aiResponseCache = null;
+            
+            function getAIResponseCache() {
+                if (aiResponseCache) return aiResponseCache;
+                try {
+                    aiResponseCache = new Map(JSON.parse(localStorage.getItem(AI_CACHE_KEY) || '[]'));
+                } catch (e) {
+                    aiResponseCache = new Map();
+                }
+                return aiResponseCache;
+            }
+            
+            function persistAIResponseCache() {
+                try {
+                    localStorage.setItem(AI_CACHE_KEY, JSON.stringify([...getAIResponseCache()]));
+                } catch (e) {
+                    // 存储空间不足时仅保留内存缓存
+                }
+            }
+            
+            // FNV-1a 32 位哈希，用于生成上下文指纹
+            function fnv1a(text) {
+                let hash = 0x811c9dc5;
+                for (let i = 0; i < text.length; i++) {
+                    hash ^= text.charCodeAt(i);
+                    hash = Math.imul(hash, 0x01000193);
+                }
+                return (hash >>> 0).toString(16);
+            }
+            
+            // 缓存键包含此前的对话轮次指纹，"继续"等依赖上下文的追问不会命中其他对话的回复
+            function buildAICacheKey(message, provider, model, context, priorTurns) {
+                const normalized = message.trim().toLowerCase().replace(/\\s+/g, ' ');
+                const history = priorTurns.map(m => `${m.role}:${m.content}`).join('\\n');
+                return `${provider}|${model}|${fnv1a(context || '')}|${fnv1a(history)}|${normalized}`;
+            }
+            
+            function getCachedAIResponse(key) {
+                const cache = getAIResponseCache();
+                if (!cache.has(key)) return null;
+                // 命中后移到末尾，保持最近使用顺序
+                const response = cache.get(key);
+                cache.delete(key);
+                cache.set(key, response);
+                return response;
+            }
+            
+            function setCachedAIResponse(key, response) {
+                const cache = getAIResponseCache();
+                cache.delete(key);
+                cache.set(key, response);
+                while (cache.size > AI_CACHE_MAX_SIZE) {
+                    cache.delete(cache.keys().next().value);
+                }
+                scheduleIdle(persistAIResponseCache);
+            }
+            
+            // 读取 SSE 响应体，按事件（空行分隔）逐个产出增量文本（由 parseDelta 从事件中提取）
+            async function* streamSSEDeltas(response, parseDelta) {
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                while (true) {
+                    const { done, value } = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, { stream: true }).replace(/\\r\\n/g, '\\n');
+                    const events = buffer.split('\\n\\n');
+                    buffer = events.pop();
+                    for (const event of events) {
+                        for (const line of event.split('\\n')) {
+                            if (!line.startsWith('data:')) continue;
+                            const payload = line.slice(5).trim();
+                            // OpenAI / DeepSeek 以 [DONE] 结束
+                            if (!payload || payload === '[DONE]') continue;
+                            let delta;
+                            try {
+                                delta = parseDelta(JSON.parse(payload));
+                            } catch (e) {
+                                continue;
+                            }
+                            if (delta) yield delta;
+                        }
                     }
-                    
-                    // 4. 使用本地配置的 AI API
-                    const newsContext = await getNewsContext();
-                    const response = await callAIAPI(message, newsContext);
-                    
-                    removeLoadingMessage();
-                    addChatMessage('assistant', response);
-                    
-                } catch (error) {
-                    removeLoadingMessage();
-                    addChatMessage('system', `❌ 错误: ${error.message}`);
-                } finally {
-                    isWaitingResponse = false;
-                    document.getElementById('chatSendBtn').disabled = false;
                 }
             }
             
-            // 获取新闻上下文
-            async function getNewsContext() {
-                // 先尝试从 MCP Server 获取最新数据
-                const mcpUrl = localStorage.getItem('mcpServerUrl') || 'http://127.0.0.1:3333';
+            // AI 接口适配器：各自负责请求地址、请求头、请求体格式及响应解析
+            const PROVIDER_ADAPTERS = Object.freeze({
+                // OpenAI 兼容接口（OpenAI、DeepSeek 及自定义服务）
+                openai: Object.freeze({
+                    buildRequest({ baseUrl, apiKey, model, systemPrompt, history, maxTokens }) {
+                        return {
+                            url: `${baseUrl}/chat/completions`,
+                            headers: {
+                                'Content-Type': 'application/json',
+                                'Authorization': `Bearer ${apiKey}`
+                            },
+                            body: {
+                                model,
+                                messages: [{ role: 'system', content: systemPrompt }, ...history],
+                                temperature: 0.7,
+                                max_tokens: maxTokens,
+                                stream: true
+                            }
+                        };
+                    },
+                    parseDelta: (event) => event.choices?.[0]?.delta?.content,
+                    parseResponse: (data) => data.choices?.[0]?.message?.content
+                }),
+                // Anthropic Messages 接口：系统提示词为顶层字段，并标记为可缓存
+                anthropic: Object.freeze({
+                    buildRequest({ baseUrl, apiKey, model, systemPrompt, history, maxTokens }) {
+                        // 消息须以用户消息开头
+                        const firstUser = history.findIndex(m => m.role === 'user');
+                        return {
+                            url: `${baseUrl}/messages`,
+                            headers: {
+                                'Content-Type': 'application/json',
+                                'x-api-key': apiKey,
+                                'anthropic-version': '2023-06-01',
+                                'anthropic-dangerous-direct-browser-access': 'true'
+                            },
+                            body: {
+                                model,
+                                system: [{ type: 'text', text: systemPrompt, cache_control: { type: 'ephemeral' } }],
+                                messages: firstUser > 0 ? history.slice(firstUser) : history,
+                                temperature: 0.7,
+                                max_tokens: maxTokens,
+                                stream: true
+                            }
+                        };
+                    },
+                    parseDelta: (event) => event.type === 'content_block_delta' ? event.delta?.text : undefined,
+                    parseResponse: (data) => data.content?.find(block => block.type === 'text')?.text
+                })
+            });
+            
+            // 问题复杂度判断：分析类问题使用更强的模型和更大的输出长度
+            const ANALYSIS_QUESTION_RE = /分析|趋势|对比|比较|原因|为什么|预测|影响|建议/;
+            const ANALYSIS_QUESTION_MIN_LENGTH = 60;
+            const MAX_TOKENS_BY_COMPLEXITY = { simple: 500, analysis: 1000 };
+            
+            function classifyComplexity(message) {
+                if (message.length >= ANALYSIS_QUESTION_MIN_LENGTH || ANALYSIS_QUESTION_RE.test(message)) {
+                    return 'analysis';
+                }
+                return 'simple';
+            }
+            
+            // AI 提供商配置表（按问题复杂度选择模型，未配置分级模型时使用 simple 模型）
+            // 自定义服务无法确定可用模型，统一使用默认模型，地址取用户配置
+            const PROVIDERS = Object.freeze({
+                deepseek: Object.freeze({
+                    adapter: PROVIDER_ADAPTERS.openai,
+                    baseUrl: 'https://api.deepseek.com/v1',
+                    models: Object.freeze({ simple: 'deepseek-chat', analysis: 'deepseek-chat' })
+                }),
+                openai: Object.freeze({
+                    adapter: PROVIDER_ADAPTERS.openai,
+                    baseUrl: 'https://api.openai.com/v1',
+                    models: Object.freeze({ simple: 'gpt-4o-mini', analysis: 'gpt-4o' })
+                }),
+                anthropic: Object.freeze({
+                    adapter: PROVIDER_ADAPTERS.anthropic,
+                    baseUrl: 'https://api.anthropic.com/v1',
+                    models: Object.freeze({ simple: 'claude-3-haiku-20240307' })
+                }),
+                custom: Object.freeze({
+                    adapter: PROVIDER_ADAPTERS.openai,
+                    baseUrl: 'https://api.openai.com/v1',
+                    models: Object.freeze({ simple: 'gpt-4o-mini', analysis: 'gpt-4o-mini' })
+                })
+            });
+            
+            // 获取 AI 提供商的接口适配器、API 地址和模型
+            function getProviderConfig(provider, customBaseUrl, complexity = 'simple') {
+                const config = PROVIDERS[provider] ?? PROVIDERS.deepseek;
+                const baseUrl = provider === 'custom' ? (customBaseUrl || config.baseUrl) : config.baseUrl;
+                return { adapter: config.adapter, baseUrl, model: config.models[complexity] ?? config.models.simple };
+            }
+            
+            // 预热 AI 服务连接：提前完成 DNS/TLS 握手，首条消息不再承担握手耗时
+            const warmedOrigins = new Set();
+            function warmUpAIConnection() {
+                const { provider, apiKey, baseUrl: customBaseUrl } = getChatSettings();
+                // 未配置本地 API Key 时不会直连 AI 服务
+                if (!apiKey) return;
+                
+                const { baseUrl } = getProviderConfig(provider, customBaseUrl);
+                let origin;
                 try {
-                    const mcpData = await callMCPTool('get_trending_topics', { top_n: 15 });
-                    if (mcpData && mcpData.topics) {
-                        return `当前热点话题（来自 MCP Server）:\\n` +
-                               mcpData.topics.map(t => `- ${t.keyword}: ${t.frequency} 条相关新闻`).join('\\n');
-                    }
+                    origin = new URL(baseUrl).origin;
                 } catch (e) {
-                    console.log('MCP Server 不可用，使用页面数据:', e.message);
+                    return;
                 }
+                if (warmedOrigins.has(origin)) return;
+                warmedOrigins.add(origin);
                 
-                // 回退：从当前页面提取新闻数据
-                const newsItems = [];
-                document.querySelectorAll('.word-group').forEach(group => {
-                    const keyword = group.querySelector('.word-name')?.textContent || '';
-                    group.querySelectorAll('.news-item').forEach(item => {
-                        const title = item.querySelector('.news-title')?.textContent || '';
-                        const source = item.querySelector('.source-name')?.textContent || '';
-                        newsItems.push({ keyword, title, source });
-                    });
-                });
+                const link = document.createElement('link');
+                link.rel = 'preconnect';
+                link.href = origin;
+                link.crossOrigin = 'anonymous';
+                document.head.appendChild(link);
                 
-                return `当前页面包含 ${newsItems.length} 条热点新闻:\\n` +
-                       newsItems.slice(0, 20).map(n => `- [${n.keyword}] ${n.title}`).join('\\n');
+                // 发后即忘的 HEAD 请求，确保连接真正建立（响应内容不关心）
+                fetch(`${baseUrl}/models`, { method: 'HEAD', mode: 'no-cors', keepalive: true }).catch(() => {});
             }
             
-            // 调用 MCP Server 工具
-            async function callMCPTool(toolName, params = {}) {
-                const mcpUrl = localStorage.getItem('mcpServerUrl') || 'http://127.0.0.1:3333';
+            // 系统提示词的固定部分（每轮对话完全相同）
+            const CHAT_SYSTEM_PROMPT = `你是 TrendRadar AI 助手，专门帮助用户分析热点新闻。你的能力包括：
+1. 分析新闻趋势和热度变化
+2. 总结重要新闻要点
+3. 识别新闻之间的关联
+4. 提供投资/关注建议
+5. 回答用户关于新闻的问题
+
+请用简洁专业的中文回答用户问题。如果涉及投资建议，请加上风险提示。`;
+            
+            // AI 请求超时与重试设置
+            const AI_REQUEST_TIMEOUT_MS = 15000;
+            const AI_MAX_RETRIES = 2;
+            const AI_RETRY_BASE_DELAY_MS = 500;
+            
+            function sleep(ms) {
+                return new Promise(resolve => setTimeout(resolve, ms));
+            }
+            
+            // 带超时的 fetch：超时只限制到响应头返回为止，流式正文不受影响；同时跟随外部中止信号
+            // 返回 { response, release }，读完正文或放弃本次响应后调用 release 解除对外部信号的监听
+            async function fetchWithTimeout(url, options, timeoutMs) {
+                const controller = new AbortController();
+                const outerSignal = options.signal;
+                const onOuterAbort = () => controller.abort();
+                const release = () => outerSignal?.removeEventListener('abort', onOuterAbort);
+                if (outerSignal) {
+                    if (outerSignal.aborted) {
+                        controller.abort();
+                    } else {
+                        outerSignal.addEventListener('abort', onOuterAbort, { once: true });
+                    }
+                }
+                
+                let timedOut = false;
+                const timer = setTimeout(() => {
+                    timedOut = true;
+                    controller.abort();
+                }, timeoutMs);
                 
                 try {
-                    const response = await fetch(`${mcpUrl}/mcp`, {
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/json'
-                        },
-                        body: JSON.stringify({
-                            jsonrpc: '2.0',
-                            method: 'tools/call',
-                            params: {
-                                name: toolName,
-                                arguments: params
-                            },
-                            id: Date.now()
-                        })
-                    });
-                    
-                    if (!response.ok) {
-                        throw new Error(`MCP 请求失败: ${response.status}`);
-                    }
-                    
-                    const data = await response.json();
-                    if (data.error) {
-                        throw new Error(data.error.message);
-                    }
-                    
-                    // 解析结果
-                    const content = data.result?.content?.[0]?.text;
-                    return content ? JSON.parse(content) : null;
+                    const response = await fetch(url, { ...options, signal: controller.signal });
+                    return { response, release };
                 } catch (error) {
-                    console.error('MCP 调用失败:', error);
+                    release();
+                    if (timedOut) {
+                        const timeoutError = new Error('AI 服务响应超时');
+                        timeoutError.name = 'TimeoutError';
+                        throw timeoutError;
+                    }
                     throw error;
+                } finally {
+                    clearTimeout(timer);
                 }
             }
             
-            // 智能意图识别和 MCP 工具调用
-            async function processWithMCP(message) {
-                const lowerMsg = message.toLowerCase();
+            // 调用 AI API
+            async function callAIAPI(message, context, onDelta) {
+                const { provider, apiKey, baseUrl: customBaseUrl } = getChatSettings();
+                const complexity = classifyComplexity(message);
+                const { adapter, baseUrl, model } = getProviderConfig(provider, customBaseUrl, complexity);
                 
-                // 1. 搜索意图
-                if (lowerMsg.includes('搜索') || lowerMsg.includes('查找') || lowerMsg.includes('找')) {
-                    const keyword = message.replace(/搜索|查找|找|关于|的新闻|新闻/g, '').trim();
-                    if (keyword) {
-                        try {
-                            const result = await callMCPTool('search_news', { 
-                                query: keyword, 
-                                limit: 10 
-                            });
-                            if (result && result.data) {
-                                return `🔍 找到 ${result.summary?.total || 0} 条关于"${keyword}"的新闻:\\n\\n` +
-                                       result.data.slice(0, 10).map((n, i) => 
-                                           `${i+1}. [${n.platform_name}] ${n.title}`
-                                       ).join('\\n');
-                            }
-                        } catch (e) {
-                            return null;
-                        }
-                    }
-                }
+                // 命中缓存时直接返回，不发起网络请求
+                // 历史窗口末尾是本轮用户消息，之前的才是上下文轮次
+                const priorTurns = chatHistory.slice(0, -1);
+                const cached = getCachedAIResponse(buildAICacheKey(message, provider, model, context, priorTurns));
+                if (cached) return cached;
                 
-                // 2. 热点/趋势意图
-                if (lowerMsg.includes('热点') || lowerMsg.includes('趋势') || lowerMsg.includes('热门') || lowerMsg.includes('今日')) {
-                    try {
-                        const result = await callMCPTool('get_trending_topics', { top_n: 10 });
-                        if (result && result.topics) {
-                            return `📊 当前热门话题 TOP 10:\\n\\n` +
-                                   result.topics.map((t, i) => {
-                                       const icon = i < 3 ? '🔥' : (i < 6 ? '📈' : '📌');
-                                       return `${icon} ${i+1}. ${t.keyword} - ${t.frequency} 条相关新闻`;
-                                   }).join('\\n');
-                        }
-                    } catch (e) {
-                        return null;
-                    }
-                }
+                // 构建系统提示词：固定说明在前，新闻数据在后，便于服务端复用提示词前缀缓存
+                const systemPrompt = `${CHAT_SYSTEM_PROMPT}
+
+当前新闻数据：
+${context}`;
                 
-                // 3. RSS 订阅意图
-                if (lowerMsg.includes('rss') || lowerMsg.includes('订阅')) {
+                // 发送请求：限流或服务端错误时退避重试，超时后改用更快的模型重试
+                // （历史窗口末尾已是本轮用户消息）
+                let requestModel = model;
+                let response;
+                let release;
+                for (let attempt = 0; ; attempt++) {
+                    const request = adapter.buildRequest({
+                        baseUrl,
+                        apiKey,
+                        model: requestModel,
+                        systemPrompt,
+                        history: chatHistory,
+                        maxTokens: MAX_TOKENS_BY_COMPLEXITY[complexity]
+                    });
                     try {
-                        const result = await callMCPTool('get_latest_rss', { days: 1, limit: 10 });
-                        if (result && result.data) {
-                            return `📰 最新 RSS 订阅内容:\\n\\n` +
-                                   result.data.slice(0, 10).map((r, i) => 
-                                       `${i+1}. [${r.feed_name}] ${r.title}`
-                                   ).join('\\n');
-                        }
-                    } catch (e) {
-                        return null;
+                        ({ response, release } = await fetchWithTimeout(request.url, {
+                            method: 'POST',
+                            signal: chatAbortController?.signal,
+                            headers: request.headers,
+                            body: JSON.stringify(request.body)
+                        }, AI_REQUEST_TIMEOUT_MS));
+                    } catch (error) {
+                        if (error.name !== 'TimeoutError' || attempt >= AI_MAX_RETRIES) throw error;
+                        requestModel = getProviderConfig(provider, customBaseUrl, 'simple').model;
+                        continue;
                     }
-                }
-                
-                // 4. 深度分析意图
-                if (lowerMsg.includes('分析') && (lowerMsg.includes('趋势') || lowerMsg.includes('话题'))) {
-                    // 提取话题关键词
-                    const topicMatch = message.match(/分析[""'']?(.+?)[""'']?的?趋势/);
-                    const topic = topicMatch ? topicMatch[1] : '';
                     
-                    if (topic) {
-                        try {
-                            const result = await callMCPTool('analyze_topic_trend', { 
-                                topic: topic,
-                                analysis_type: 'trend'
-                            });
-                            if (result && result.trend_analysis) {
-                                const ta = result.trend_analysis;
-                                return `📈 "${topic}" 趋势分析:\\n\\n` +
-                                       `• 数据周期: ${ta.date_range?.start || '今天'} 至 ${ta.date_range?.end || '今天'}\\n` +
-                                       `• 相关新闻: ${ta.total_news || 0} 条\\n` +
-                                       `• 趋势方向: ${ta.trend_direction || '稳定'}\\n` +
-                                       (ta.daily_counts ? `• 每日分布: ${JSON.stringify(ta.daily_counts)}` : '');
-                            }
-                        } catch (e) {
-                            return null;
-                        }
+                    if ((response.status === 429 || response.status >= 500) && attempt < AI_MAX_RETRIES) {
+                        // 放弃本次响应：取消未读正文以释放连接，并解除对本轮中止信号的监听
+                        response.body?.cancel().catch(() => {});
+                        release();
+                        await sleep(AI_RETRY_BASE_DELAY_MS * 2 ** attempt + Math.random() * AI_RETRY_BASE_DELAY_MS);
+                        continue;
                     }
+                    break;
                 }
                 
-                // 5. 情感分析意图
-                if (lowerMsg.includes('情感') || lowerMsg.includes('舆情') || lowerMsg.includes('态度')) {
-                    const topicMatch = message.match(/[关于对]?[""'']?(.+?)[""'']?的?[情感舆情态度]/);
-                    const topic = topicMatch ? topicMatch[1].replace(/[的关于对]/g, '') : '';
+                // 按实际作答的模型写入缓存（超时回退后可能与初始模型不同）
+                const cacheKey = buildAICacheKey(message, provider, requestModel, context, priorTurns);
+                
+                try {
+                    if (!response.ok) {
+                        const error = await response.json().catch(() => ({}));
+                        throw new Error(error.error?.message || `API 请求失败: ${response.status}`);
+                    }
                     
-                    if (topic) {
-                        try {
-                            const result = await callMCPTool('analyze_sentiment', { 
-                                topic: topic,
-                                limit: 20
-                            });
-                            if (result && result.sentiment_analysis) {
-                                const sa = result.sentiment_analysis;
-                                return `🎭 "${topic}" 情感分析:\\n\\n` +
-                                       `• 正面: ${sa.positive_ratio || 0}%\\n` +
-                                       `• 中性: ${sa.neutral_ratio || 0}%\\n` +
-                                       `• 负面: ${sa.negative_ratio || 0}%\\n` +
-                                       `• 样本量: ${sa.total_analyzed || 0} 条新闻`;
+                    // 服务端未按流式返回时，按普通 JSON 处理
+                    const contentType = response.headers.get('content-type') || '';
+                    if (!response.body || !contentType.includes('text/event-stream')) {
+                        const data = await response.json();
+                        const content = adapter.parseResponse(data);
+                        if (content) setCachedAIResponse(cacheKey, content);
+                        return content || '无法获取回复';
+                    }
+                    
+                    // 逐段消费 SSE 增量内容，每收到一段就交给 onDelta 渲染
+                    let reply = '';
+                    for await (const delta of streamSSEDeltas(response, adapter.parseDelta)) {
+                        reply += delta;
+                        if (onDelta) onDelta(delta);
+                    }
+                    if (reply) setCachedAIResponse(cacheKey, reply);
+                    return reply || '无法获取回复';
+                } finally {
+                    release();
+                }
+            }
+        </script>
+    </body>
+    </html>
+    """
+# 脚本随每份报告内联（报告需单文件离线可用），导入时精简一次以减小体积
+# 注意：修改上面的脚本时，反引号只能用于模板字符串，见 _compact_script
+_HTML_SCRIPT = _compact_script(_HTML_SCRIPT)
+
+
+def render_html_content(
+    report_data: Dict,
+    total_titles: int,
+    mode: str = "daily",
+    update_info: Optional[Dict] = None,
+    *,
+    region_order: Optional[List[str]] = None,
+    get_time_func: Optional[Callable[[], datetime]] = None,
+    rss_items: Optional[List[Dict]] = None,
+    rss_new_items: Optional[List[Dict]] = None,
+    display_mode: str = "keyword",
+    standalone_data: Optional[Dict] = None,
+    ai_analysis: Optional[Any] = None,
+    show_new_section: bool = True,
+) -> str:
+    """渲染HTML内容
+
+    Args:
+        report_data: 报告数据字典，包含 stats, new_titles, failed_ids, total_new_count
+        total_titles: 新闻总数
+        mode: 报告模式 ("daily", "current", "incremental")
+        update_info: 更新信息（可选）
+        region_order: 区域显示顺序列表
+        get_time_func: 获取当前时间的函数（可选，默认使用 datetime.now）
+        rss_items: RSS 统计条目列表（可选）
+        rss_new_items: RSS 新增条目列表（可选）
+        display_mode: 显示模式 ("keyword"=按关键词分组, "platform"=按平台分组)
+        standalone_data: 独立展示区数据（可选），包含 platforms 和 rss_feeds
+        ai_analysis: AI 分析结果对象（可选），AIAnalysisResult 实例
+        show_new_section: 是否显示新增热点区域
+
+    Returns:
+        渲染后的 HTML 字符串
+    """
+    # 默认区域顺序
+    default_region_order = ["hotlist", "rss", "new_items", "standalone", "ai_analysis"]
+    if region_order is None:
+        region_order = default_region_order
+
+    html_parts = [_HTML_HEAD]
+
+    # 处理报告类型显示（根据 mode 直接显示）
+    if mode == "current":
+        html_parts.append("当前榜单")
+    elif mode == "incremental":
+        html_parts.append("增量分析")
+    else:
+        html_parts.append("全天汇总")
+
+    html_parts.append("""</span>
+                    </div>
+                    <div class="info-item">
+                        <span class="info-label">新闻总数</span>
+                        <span class="info-value">""")
+
+    html_parts.append(f"{total_titles} 条")
+
+    # 计算筛选后的热点新闻数量
+    hot_news_count = sum(len(stat["titles"]) for stat in report_data["stats"])
+
+    new_items_count = 0
+    if show_new_section and report_data["new_titles"]:
+        new_items_count = sum(len(source_data["titles"]) for source_data in report_data["new_titles"])
+
+    html_parts.append("""</span>
+                    </div>
+                    <div class="info-item">
+                        <span class="info-label">热点新闻</span>
+                        <span class="info-value">""")
+
+    html_parts.append(f"{hot_news_count} 条")
+
+    html_parts.append("""</span>
+                    </div>
+                    <div class="info-item">
+                        <span class="info-label">生成时间</span>
+                        <span class="info-value">""")
+
+    # 使用提供的时间函数或默认 datetime.now
+    if get_time_func:
+        now = get_time_func()
+    else:
+        now = datetime.now()
+    html_parts.append(now.strftime("%m-%d %H:%M"))
+
+    html_parts.append("""</span>
+                    </div>
+                </div>
+            </div>
+
+            <div class="toolbar">
+                <div class="search-box">
+                    <span class="search-icon">🔍</span>
+                    <input type="text" class="search-input" placeholder="搜索新闻标题..." oninput="handleSearch(this.value)">
+                </div>
+                <button class="toolbar-btn" onclick="toggleAllGroups()" title="展开/折叠全部">
+                    <span>📂</span> 折叠
+                </button>
+                <button class="toolbar-btn" onclick="toggleDarkMode()" title="切换暗色模式">
+                    <span class="dark-mode-icon">🌙</span> 暗色
+                </button>
+                <button class="toolbar-btn" id="autoRefreshBtn" onclick="toggleAutoRefresh()" title="自动刷新">
+                    <span>🔄</span> <span id="autoRefreshText">自动刷新</span>
+                </button>
+            </div>
+            <div class="search-stats" id="searchStats"></div>
+            <div class="refresh-countdown hidden" id="refreshCountdown">下次刷新: <span id="countdown">--</span> 秒</div>
+""")
+
+    # 统计卡片直接由服务端填充数值
+    html_parts.append(f"""
+            <div class="stats-cards" id="statsCards">
+                <div class="stat-card">
+                    <div class="stat-value" id="statTotalNews">{total_titles}</div>
+                    <div class="stat-label">新闻总数</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-value" id="statHotNews">{hot_news_count}</div>
+                    <div class="stat-label">热点新闻</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-value" id="statKeywords">{len(report_data["stats"])}</div>
+                    <div class="stat-label">关键词组</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-value" id="statNewItems">{new_items_count}</div>
+                    <div class="stat-label">新增热点</div>
+                </div>
+            </div>
+""")
+
+    html_parts.append("""
+
+            <!-- 数据可视化图表区域 -->
+            <div class="charts-section" id="chartsSection">
+                <div class="charts-grid">
+                    <div class="chart-container">
+                        <div class="chart-title">📊 平台分布</div>
+                        <div class="chart-canvas-wrapper">
+                            <canvas id="platformChart"></canvas>
+                        </div>
+                    </div>
+                    <div class="chart-container">
+                        <div class="chart-title">🔥 热词 TOP 10</div>
+                        <div class="chart-canvas-wrapper">
+                            <canvas id="keywordChart"></canvas>
+                        </div>
+                    </div>
+                </div>
+            </div>
+
+            <div class="content">""")
+
+    # 处理失败ID错误信息
+    if report_data["failed_ids"]:
+        html_parts.append("""
+                <div class="error-section">
+                    <div class="error-title">⚠️ 请求失败的平台</div>
+                    <ul class="error-list">""")
+        for id_value in report_data["failed_ids"]:
+            html_parts.append(f'<li class="error-item">{html_escape(id_value)}</li>')
+        html_parts.append("""
+                    </ul>
+                </div>""")
+
+    # 计算图表数据及页面新闻索引（供 AI 对话上下文使用）
+    platform_counts = {}
+    keyword_counts = []
+    news_count = 0
+    news_sample = []
+    
+    if report_data["stats"]:
+        for stat in report_data["stats"]:
+            # 统计关键词热度
+            keyword_counts.append({
+                "word": stat["word"],
+                "count": stat["count"]
+            })
+            for title_data in stat["titles"]:
+                # 统计平台分布
+                platform = title_data.get("source_name", "未知")
+                platform_counts[platform] = platform_counts.get(platform, 0) + 1
+                # AI 上下文只用到总数和前 20 条，无需嵌入完整新闻列表
+                news_count += 1
+                if len(news_sample) < 20:
+                    news_sample.append({
+                        "keyword": stat["word"],
+                        "title": title_data["title"],
+                    })
+    
+    # 取 TOP 10 关键词，直接生成图表所需的标签（超过 8 字截断）和数值
+    keyword_counts = keyword_counts[:10]
+    keyword_chart = {
+        "labels": [
+            k["word"][:8] + "..." if len(k["word"]) > 8 else k["word"]
+            for k in keyword_counts
+        ],
+        "data": [k["count"] for k in keyword_counts],
+    }
+
+    # 页面数据整体序列化为一个 JSON，前端解析一次后复用（转义 < 防止提前闭合 script 标签）
+    tr_data_json = _dumps_page_data(
+        {
+            "platform": platform_counts,
+            "keywords": keyword_chart,
+            "news": {"total": news_count, "items": news_sample},
+        }
+    ).replace("<", "\\u003c")
+
+    # 生成热点词汇统计部分的HTML
+    stats_html = ""
+    if report_data["stats"]:
+        total_count = len(report_data["stats"])
+
+        for i, stat in enumerate(report_data["stats"], 1):
+            count = stat["count"]
+
+            # 确定热度等级
+            if count >= 10:
+                count_class = "hot"
+            elif count >= 5:
+                count_class = "warm"
+            else:
+                count_class = ""
+
+            escaped_word = html_escape(stat["word"])
+
+            stats_html += f"""
+                <div class="word-group">
+                    <div class="word-header">
+                        <div class="word-info">
+                            <div class="word-name">{escaped_word}</div>
+                            <div class="word-count {count_class}">{count} 条</div>
+                            <span class="collapse-icon">▼</span>
+                        </div>
+                        <div class="word-index">{i}/{total_count}</div>
+                    </div>"""
+
+            # 处理每个词组下的新闻标题，给每条新闻标上序号
+            escaped_titles, escaped_urls = _escape_titles_and_urls(
+                stat["titles"], lambda t: t.get("mobile_url") or t.get("url", "")
+            )
+            for j, (title_data, escaped_title, escaped_url) in enumerate(
+                zip(stat["titles"], escaped_titles, escaped_urls), 1
+            ):
+                is_new = title_data.get("is_new", False)
+                new_class = "new" if is_new else ""
+
+                header_parts = []
+
+                # 根据 display_mode 决定显示来源还是关键词
+                if display_mode == "keyword":
+                    # keyword 模式：显示来源
+                    header_parts.append(f'<span class="source-name">{html_escape(title_data["source_name"])}</span>')
+                else:
+                    # platform 模式：显示关键词
+                    matched_keyword = title_data.get("matched_keyword", "")
+                    if matched_keyword:
+                        header_parts.append(f'<span class="keyword-tag">[{html_escape(matched_keyword)}]</span>')
+
+                # 处理排名显示
+                ranks = title_data.get("ranks", [])
+                if ranks:
+                    min_rank, rank_text = _rank_range(ranks)
+                    rank_class = _rank_class(min_rank, title_data.get("rank_threshold", 10))
+                    header_parts.append(f'<span class="rank-num {rank_class}">{rank_text}</span>')
+
+                # 处理时间显示
+                time_display = title_data.get("time_display", "")
+                if time_display:
+                    # 简化时间显示格式，将波浪线替换为~
+                    simplified_time = (
+                        time_display.replace(" ~ ", "~")
+                        .replace("[", "")
+                        .replace("]", "")
+                    )
+                    header_parts.append(f'<span class="time-info">{html_escape(simplified_time)}</span>')
+
+                # 处理出现次数
+                count_info = title_data.get("count", 1)
+                if count_info > 1:
+                    header_parts.append(f'<span class="count-info">{count_info}次</span>')
+
+                # 处理标题和链接
+                stats_html += _render_news_item(
+                    j, escaped_title, escaped_url, header_parts, f"news-item {new_class}"
+                )
+
+            stats_html += """
+                </div>"""
+
+    # 给热榜统计添加外层包装
+    if stats_html:
+        stats_html = f"""
+                <div class="hotlist-section">{stats_html}
+                </div>"""
+
+    # 生成新增新闻区域的HTML
+    new_titles_html = ""
+    if show_new_section and report_data["new_titles"]:
+        new_titles_html += f"""
+                <div class="new-section">
+                    <div class="new-section-title">本次新增热点 (共 {report_data['total_new_count']} 条)</div>"""
+
+        for source_data in report_data["new_titles"]:
+            escaped_source = html_escape(source_data["source_name"])
+            titles_count = len(source_data["titles"])
+
+            new_titles_html += f"""
+                    <div class="new-source-group">
+                        <div class="new-source-title">{escaped_source} · {titles_count}条</div>"""
+
+            # 为新增新闻也添加序号
+            escaped_titles, escaped_urls = _escape_titles_and_urls(
+                source_data["titles"], lambda t: t.get("mobile_url") or t.get("url", "")
+            )
+            for idx, (title_data, escaped_title, escaped_url) in enumerate(
+                zip(source_data["titles"], escaped_titles, escaped_urls), 1
+            ):
+                ranks = title_data.get("ranks", [])
+
+                # 处理新增新闻的排名显示
+                rank_class = ""
+                if ranks:
+                    min_rank = min(ranks)
+                    rank_class = _rank_class(min_rank, title_data.get("rank_threshold", 10))
+
+                    if len(ranks) == 1:
+                        rank_text = str(ranks[0])
+                    else:
+                        rank_text = f"{min(ranks)}-{max(ranks)}"
+                else:
+                    rank_text = "?"
+
+                new_titles_html += f"""
+                        <div class="new-item">
+                            <div class="new-item-number">{idx}</div>
+                            <div class="new-item-rank {rank_class}">{rank_text}</div>
+                            <div class="new-item-content">
+                                <div class="new-item-title">"""
+
+                # 处理新增新闻的链接
+                new_titles_html += _render_title(escaped_title, escaped_url)
+
+                new_titles_html += """
+                                </div>
+                            </div>
+                        </div>"""
+
+            new_titles_html += """
+                    </div>"""
+
+        new_titles_html += """
+                </div>"""
+
+    # 生成 RSS 统计内容
+    def render_rss_stats_html(stats: List[Dict], title: str = "RSS 订阅更新") -> str:
+        """渲染 RSS 统计区块 HTML
+
+        Args:
+            stats: RSS 分组统计列表，格式与热榜一致：
+                [
+                    {
+                        "word": "关键词",
+                        "count": 5,
+                        "titles": [
+                            {
+                                "title": "标题",
+                                "source_name": "Feed 名称",
+                                "time_display": "12-29 08:20",
+                                "url": "...",
+                                "is_new": True/False
                             }
-                        } catch (e) {
-                            return null;
-                        }
+                        ]
                     }
-                }
-                
-                // 6. 平台对比意图
-                if (lowerMsg.includes('平台') && (lowerMsg.includes('对比') || lowerMsg.includes('比较'))) {
-                    try {
-                        const result = await callMCPTool('analyze_data_insights', { 
-                            insight_type: 'platform_activity'
-                        });
-                        if (result && result.platform_stats) {
-                            const stats = result.platform_stats;
-                            return `📱 平台活跃度对比:\\n\\n` +
-                                   Object.entries(stats)
-                                       .sort((a, b) => b[1].news_count - a[1].news_count)
-                                       .slice(0, 8)
-                                       .map(([ name, data], i) => 
-                                           `${i+1}. ${name}: ${data.news_count} 条新闻`
-                                       ).join('\\n');
+                ]
+            title: 区块标题
+
+        Returns:
+            渲染后的 HTML 字符串
+        """
+        if not stats:
+            return ""
+
+        # 计算总条目数
+        total_count = sum(stat.get("count", 0) for stat in stats)
+        if total_count == 0:
+            return ""
+
+        rss_html = f"""
+                <div class="rss-section">
+                    <div class="rss-section-header">
+                        <div class="rss-section-title">{title}</div>
+                        <div class="rss-section-count">{total_count} 条</div>
+                    </div>"""
+
+        # 按关键词分组渲染（与热榜格式一致）
+        for stat in stats:
+            keyword = stat.get("word", "")
+            titles = stat.get("titles", [])
+            if not titles:
+                continue
+
+            keyword_count = len(titles)
+
+            rss_html += f"""
+                    <div class="feed-group">
+                        <div class="feed-header">
+                            <div class="feed-name">{html_escape(keyword)}</div>
+                            <div class="feed-count">{keyword_count} 条</div>
+                        </div>"""
+
+            escaped_titles, escaped_urls = _escape_titles_and_urls(
+                titles, lambda t: t.get("url", "")
+            )
+            for title_data, escaped_title, escaped_url in zip(titles, escaped_titles, escaped_urls):
+                time_display = title_data.get("time_display", "")
+                source_name = title_data.get("source_name", "")
+                is_new = title_data.get("is_new", False)
+
+                rss_html += """
+                        <div class="rss-item">
+                            <div class="rss-meta">"""
+
+                if time_display:
+                    rss_html += f'<span class="rss-time">{html_escape(time_display)}</span>'
+
+                if source_name:
+                    rss_html += f'<span class="rss-author">{html_escape(source_name)}</span>'
+
+                if is_new:
+                    rss_html += '<span class="rss-author" style="color: #dc2626;">NEW</span>'
+
+                rss_html += """
+                            </div>
+                            <div class="rss-title">"""
+
+                rss_html += _render_title(escaped_title, escaped_url, "rss-link")
+
+                rss_html += """
+                            </div>
+                        </div>"""
+
+            rss_html += """
+                    </div>"""
+
+        rss_html += """
+                </div>"""
+        return rss_html
+
+    # 生成独立展示区内容
+    def render_standalone_html(data: Optional[Dict]) -> str:
+        """渲染独立展示区 HTML（复用热点词汇统计区样式）
+
+        Args:
+            data: 独立展示数据，格式：
+                {
+                    "platforms": [
+                        {
+                            "id": "zhihu",
+                            "name": "知乎热榜",
+                            "items": [
+                                {
+                                    "title": "标题",
+                                    "url": "链接",
+                                    "rank": 1,
+                                    "ranks": [1, 2, 1],
+                                    "first_time": "08:00",
+                                    "last_time": "12:30",
+                                    "count": 3,
+                                }
+                            ]
                         }
-                    } catch (e) {
-                        return null;
-                    }
-                }
-                
-                // 7. 系统状态意图
-                if (lowerMsg.includes('状态') || lowerMsg.includes('系统') || lowerMsg.includes('版本')) {
-                    try {
-                        const result = await callMCPTool('get_system_status', {});
-                        if (result && result.system) {
-                            return `⚙️ 系统状态:\\n\\n` +
-                                   `• 版本: ${result.system.version || '未知'}\\n` +
-                                   `• 数据存储: ${result.data?.total_storage || '未知'}\\n` +
-                                   `• 最新数据: ${result.data?.latest_record || '无'}\\n` +
-                                   `• 健康状态: ${result.health || '正常'}`;
+                    ],
+                    "rss_feeds": [
+                        {
+                            "id": "hacker-news",
+                            "name": "Hacker News",
+                            "items": [
+                                {
+                                    "title": "标题",
+                                    "url": "链接",
+                                    "published_at": "2025-01-07T08:00:00",
+                                    "author": "作者",
+                                }
+                            ]
                         }
-                    } catch (e) {
-                        return null;
-                    }
-                }
-                
-                // 8. 导出数据意图
-                if (lowerMsg.includes('导出') || lowerMsg.includes('下载')) {
-                    return `📥 数据导出功能:\\n\\n` +
-                           `你可以使用以下命令导出数据：\\n\\n` +
-                           `• "导出今日新闻" - 导出今天的新闻数据\\n` +
-                           `• "导出 RSS 数据" - 导出 RSS 订阅内容\\n\\n` +
-                           `提示：导出功能需要 MCP Server 支持，请确保服务已启动。`;
-                }
-                
-                // 9. 帮助意图
-                if (lowerMsg.includes('帮助') || lowerMsg.includes('help') || lowerMsg === '?') {
-                    return `🤖 TrendRadar AI 助手功能：\\n\\n` +
-                           `📊 **数据查询**\\n` +
-                           `• 今日热点 - 查看当前热门话题\\n` +
-                           `• 搜索 [关键词] - 搜索相关新闻\\n` +
-                           `• RSS 订阅 - 查看最新订阅内容\\n\\n` +
-                           `📈 **深度分析**\\n` +
-                           `• 分析 [话题] 的趋势 - 话题趋势分析\\n` +
-                           `• [话题] 的情感/舆情 - 情感倾向分析\\n` +
-                           `• 平台对比 - 各平台活跃度对比\\n\\n` +
-                           `⚙️ **系统功能**\\n` +
-                           `• 系统状态 - 查看系统运行状态\\n` +
-                           `• 帮助 - 显示此帮助信息`;
-                }
-                
-                return null; // 无法处理，交给 AI
-            }
-            
-            // 调用 AI API
-            async function callAIAPI(message, context) {
-                const provider = localStorage.getItem('chatProvider') || 'deepseek';
-                const apiKey = localStorage.getItem('chatApiKey');
-                const customBaseUrl = localStorage.getItem('chatBaseUrl');
-                
-                // 构建 API 配置
-                let baseUrl, model;
-                switch (provider) {
-                    case 'deepseek':
-                        baseUrl = 'https://api.deepseek.com/v1';
-                        model = 'deepseek-chat';
-                        break;
-                    case 'openai':
-                        baseUrl = 'https://api.openai.com/v1';
-                        model = 'gpt-4o-mini';
-                        break;
-                    case 'anthropic':
-                        baseUrl = 'https://api.anthropic.com/v1';
-                        model = 'claude-3-haiku-20240307';
-                        break;
-                    case 'custom':
-                        baseUrl = customBaseUrl || 'https://api.openai.com/v1';
-                        model = 'gpt-4o-mini';
-                        break;
-                    default:
-                        baseUrl = 'https://api.deepseek.com/v1';
-                        model = 'deepseek-chat';
+                    ]
                 }
-                
-                // 构建系统提示词
-                const systemPrompt = `你是 TrendRadar AI 助手，专门帮助用户分析热点新闻。你的能力包括：
-1. 分析新闻趋势和热度变化
-2. 总结重要新闻要点
-3. 识别新闻之间的关联
-4. 提供投资/关注建议
-5. 回答用户关于新闻的问题
 
-当前新闻数据：
-${context}
+        Returns:
+            渲染后的 HTML 字符串
+        """
+        if not data:
+            return ""
 
-请用简洁专业的中文回答用户问题。如果涉及投资建议，请加上风险提示。`;
-                
-                // 构建消息
-                const messages = [
-                    { role: 'system', content: systemPrompt },
-                    ...chatHistory.slice(-10).map(m => ({
-                        role: m.role === 'user' ? 'user' : 'assistant',
-                        content: m.content
-                    })),
-                    { role: 'user', content: message }
-                ];
-                
-                // 发送请求
-                const response = await fetch(`${baseUrl}/chat/completions`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                        'Authorization': `Bearer ${apiKey}`
-                    },
-                    body: JSON.stringify({
-                        model: model,
-                        messages: messages,
-                        temperature: 0.7,
-                        max_tokens: 1000
-                    })
-                });
-                
-                if (!response.ok) {
-                    const error = await response.json().catch(() => ({}));
-                    throw new Error(error.error?.message || `API 请求失败: ${response.status}`);
-                }
-                
-                const data = await response.json();
-                return data.choices?.[0]?.message?.content || '无法获取回复';
-            }
-            
-            // 图表数据（由服务端注入）
-            window.chartData = {
-                platform: """ + platform_data_json + """,
-                keywords: """ + keyword_data_json + """
-            };
-        </script>
-    </body>
-    </html>
-    """
+        platforms = data.get("platforms", [])
+        rss_feeds = data.get("rss_feeds", [])
+
+        if not platforms and not rss_feeds:
+            return ""
+
+        # 计算总条目数
+        total_platform_items = sum(len(p.get("items", [])) for p in platforms)
+        total_rss_items = sum(len(f.get("items", [])) for f in rss_feeds)
+        total_count = total_platform_items + total_rss_items
+
+        if total_count == 0:
+            return ""
+
+        standalone_html = f"""
+                <div class="standalone-section">
+                    <div class="standalone-section-header">
+                        <div class="standalone-section-title">独立展示区</div>
+                        <div class="standalone-section-count">{total_count} 条</div>
+                    </div>"""
+
+        # 渲染热榜平台（复用 word-group 结构）
+        for platform in platforms:
+            platform_name = platform.get("name", platform.get("id", ""))
+            items = platform.get("items", [])
+            if not items:
+                continue
+
+            standalone_html += f"""
+                    <div class="standalone-group">
+                        <div class="standalone-header">
+                            <div class="standalone-name">{html_escape(platform_name)}</div>
+                            <div class="standalone-count">{len(items)} 条</div>
+                        </div>"""
+
+            # 渲染每个条目（复用 news-item 结构）
+            escaped_titles, escaped_urls = _escape_titles_and_urls(
+                items, lambda item: item.get("url", "") or item.get("mobileUrl", "")
+            )
+            for j, (item, escaped_title, escaped_url) in enumerate(
+                zip(items, escaped_titles, escaped_urls), 1
+            ):
+                rank = item.get("rank", 0)
+                ranks = item.get("ranks", [])
+                first_time = item.get("first_time", "")
+                last_time = item.get("last_time", "")
+                count = item.get("count", 1)
+
+                header_parts = []
+
+                # 排名显示（复用 rank-num 样式，无 # 前缀）
+                if ranks:
+                    min_rank, rank_text = _rank_range(ranks)
+                    rank_class = _rank_class(min_rank)
+                    header_parts.append(f'<span class="rank-num {rank_class}">{rank_text}</span>')
+                elif rank > 0:
+                    rank_class = _rank_class(rank)
+                    header_parts.append(f'<span class="rank-num {rank_class}">{rank}</span>')
+
+                # 时间显示（复用 time-info 样式，将 HH-MM 转换为 HH:MM）
+                if first_time and last_time and first_time != last_time:
+                    first_time_display = convert_time_for_display(first_time)
+                    last_time_display = convert_time_for_display(last_time)
+                    header_parts.append(f'<span class="time-info">{html_escape(first_time_display)}~{html_escape(last_time_display)}</span>')
+                elif first_time:
+                    first_time_display = convert_time_for_display(first_time)
+                    header_parts.append(f'<span class="time-info">{html_escape(first_time_display)}</span>')
+
+                # 出现次数（复用 count-info 样式）
+                if count > 1:
+                    header_parts.append(f'<span class="count-info">{count}次</span>')
+
+                # 标题和链接（复用 news-link 样式）
+                standalone_html += _render_news_item(j, escaped_title, escaped_url, header_parts)
+
+            standalone_html += """
+                    </div>"""
+
+        # 渲染 RSS 源（复用相同结构）
+        for feed in rss_feeds:
+            feed_name = feed.get("name", feed.get("id", ""))
+            items = feed.get("items", [])
+            if not items:
+                continue
+
+            standalone_html += f"""
+                    <div class="standalone-group">
+                        <div class="standalone-header">
+                            <div class="standalone-name">{html_escape(feed_name)}</div>
+                            <div class="standalone-count">{len(items)} 条</div>
+                        </div>"""
+
+            escaped_titles, escaped_urls = _escape_titles_and_urls(
+                items, lambda item: item.get("url", "")
+            )
+            for j, (item, escaped_title, escaped_url) in enumerate(
+                zip(items, escaped_titles, escaped_urls), 1
+            ):
+                published_at = item.get("published_at", "")
+                author = item.get("author", "")
+
+                header_parts = []
+
+                # 时间显示（格式化 ISO 时间）
+                if published_at:
+                    try:
+                        from datetime import datetime as dt
+                        if "T" in published_at:
+                            dt_obj = dt.fromisoformat(published_at.replace("Z", "+00:00"))
+                            time_display = dt_obj.strftime("%m-%d %H:%M")
+                        else:
+                            time_display = published_at
+                    except:
+                        time_display = published_at
+
+                    header_parts.append(f'<span class="time-info">{html_escape(time_display)}</span>')
+
+                # 作者显示
+                if author:
+                    header_parts.append(f'<span class="source-name">{html_escape(author)}</span>')
+
+                standalone_html += _render_news_item(j, escaped_title, escaped_url, header_parts)
+
+            standalone_html += """
+                    </div>"""
+
+        standalone_html += """
+                </div>"""
+        return standalone_html
+
+    # 生成 RSS 统计和新增 HTML
+    rss_stats_html = render_rss_stats_html(rss_items, "RSS 订阅更新") if rss_items else ""
+    rss_new_html = render_rss_stats_html(rss_new_items, "RSS 新增更新") if rss_new_items else ""
+
+    # 生成独立展示区 HTML
+    standalone_html = render_standalone_html(standalone_data)
+
+    # 生成 AI 分析 HTML
+    ai_html = render_ai_analysis_html_rich(ai_analysis) if ai_analysis else ""
+
+    # 准备各区域内容映射（new_items 包含热榜新增和 RSS 新增两部分）
+    region_contents = {
+        "hotlist": (stats_html,),
+        "rss": (rss_stats_html,),
+        "new_items": (new_titles_html, rss_new_html),
+        "standalone": (standalone_html,),
+        "ai_analysis": (ai_html,),
+    }
+
+    def add_section_divider(content: str) -> str:
+        """为内容的外层 div 添加 section-divider 类"""
+        if not content or 'class="' not in content:
+            return content
+        first_class_pos = content.find('class="')
+        if first_class_pos != -1:
+            insert_pos = first_class_pos + len('class="')
+            return content[:insert_pos] + "section-divider " + content[insert_pos:]
+        return content
+
+    # 按 region_order 顺序收集非空区块，除首个区块外均添加分割线
+    sections = [
+        content
+        for region in region_order
+        for content in region_contents.get(region, ())
+        if content
+    ]
+    if sections:
+        html_parts.append(sections[0])
+        html_parts.extend(add_section_divider(c) for c in sections[1:])
+
+    html_parts.append("""
+            </div>
+
+            <div class="footer">
+                <div class="footer-content">
+                    由 <span class="project-name">TrendRadar</span> 生成 ·
+                    <a href="https://github.com/sansan0/TrendRadar" target="_blank" class="footer-link">
+                        GitHub 开源项目
+                    </a>""")
+
+    if update_info:
+        html_parts.append(f"""
+                    <br>
+                    <span style="color: #ea580c; font-weight: 500;">
+                        发现新版本 {update_info['remote_version']}，当前版本 {update_info['current_version']}
+                    </span>""")
+
+    html_parts.append(_HTML_CHAT_WIDGET)
+    html_parts.append(tr_data_json)
+    html_parts.append(_HTML_SCRIPT)
 
-    return html
+    # 各片段收集完毕后一次性拼接
+    return "".join(html_parts)
@@ -86,8 +86,8 @@ def convert_time_for_display(time_str: str) -> str:
     Returns:
         转换后的时间字符串，如 '15:30'
     """
-    if time_str and "-" in time_str and len(time_str) == 5:
-        return time_str.replace("-", ":")
+    if time_str and len(time_str) == 5 and time_str[2] == "-":
+        return time_str[:2] + ":" + time_str[3:]
     return time_str
 
 